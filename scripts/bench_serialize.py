@@ -0,0 +1,131 @@
+"""
+Compares serializing Download graphs through marshmallow's dump and jsonify,
+the way serialize_with used to, against cached compiled schemas with either
+JSON backend.
+
+    python scripts/bench_serialize.py [--attempts 5] [--downloads 50] [--number 200]
+
+orjson is only benchmarked when it's installed.
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+
+from flask import Flask, jsonify
+
+from flask_youtubedl.core.compiled_schema import cached_schema, dump
+from flask_youtubedl.core.schema import DownloadSchema, DownloadSummarySchema
+from flask_youtubedl.models import Download, DownloadAttempt, Video
+from flask_youtubedl.server.helpers.encoding import json_response, orjson
+
+
+def make_download(n: int, attempts: int) -> Download:
+    now = datetime.utcnow()
+    video = Video(
+        id=n,
+        video_id=f"video-{n}",
+        name=f"Video {n}",
+        webpage_url=f"https://www.youtube.com/watch?v=video-{n}",
+        duration=300,
+        extractor="youtube",
+        created=now,
+        last_modified=now,
+    )
+    dl = Download(
+        id=n,
+        download_id=f"download-{n}",
+        block_further=False,
+        video=video,
+        created=now,
+        last_modified=now,
+    )
+
+    for i in range(attempts):
+        attempt = DownloadAttempt(
+            id=n * attempts + i,
+            status="Error" if i < attempts - 1 else "Downloading",
+            options="{}",
+            filename=f"/downloads/video-{n}.mp4",
+            tmpfilename=f"/downloads/video-{n}.mp4.part",
+            downloaded_bytes=1024 * i,
+            total_bytes=1024 * attempts,
+            speed=1024.5,
+            eta=10,
+            elapsed=1.5,
+            created=now + timedelta(seconds=i),
+            last_modified=now + timedelta(seconds=i),
+        )
+        attempt.download = dl
+        attempt.video = video
+
+    dl.latest_attempt = dl.attempts[-1]
+    return dl
+
+
+def bench(label: str, fn, number: int, baseline: float = None) -> float:
+    elapsed = timeit.timeit(fn, number=number) / number
+    relative = f" ({baseline / elapsed:.1f}x)" if baseline else ""
+    print(f"  {label:<32} {elapsed * 1e6:10.1f} us{relative}")
+    return elapsed
+
+
+def run(app: Flask, label: str, schema_cls, obj, many: bool, number: int) -> None:
+    print(f"{label}:")
+
+    # what serialize_with did before, the schema was built once per view
+    schema = schema_cls(many=many)
+    compiled = cached_schema(schema_cls, many=many)
+
+    expected = schema.dump(obj).data
+    assert dump(compiled, obj) == expected, "compiled dump differs"
+
+    with app.test_request_context():
+        baseline = bench(
+            "marshmallow + jsonify",
+            lambda: jsonify(schema.dump(obj).data).get_data(),
+            number,
+        )
+        bench(
+            "compiled + jsonify",
+            lambda: jsonify(dump(compiled, obj)).get_data(),
+            number,
+            baseline,
+        )
+
+        if orjson is not None:
+            app.config["JSON_BACKEND"] = "orjson"
+            assert json.loads(json_response(expected).get_data()) == expected
+            bench(
+                "compiled + orjson",
+                lambda: json_response(dump(compiled, obj)).get_data(),
+                number,
+                baseline,
+            )
+            app.config["JSON_BACKEND"] = "json"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=5)
+    parser.add_argument("--downloads", type=int, default=50)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    downloads = [make_download(n, args.attempts) for n in range(args.downloads)]
+
+    run(app, "single download", DownloadSchema, downloads[0], False, args.number)
+    run(app, "download list", DownloadSchema, downloads, True, args.number // 10 or 1)
+    run(
+        app,
+        "download summary list",
+        DownloadSummarySchema,
+        downloads,
+        True,
+        args.number // 10 or 1,
+    )
+
+
+if __name__ == "__main__":
+    main()
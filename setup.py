@@ -17,6 +17,7 @@ setup(
         "flask-sqlalchemy>=2.4.4,<3.0.0",
         "marshmallow-annotations",
     ],
+    extras_require={"orjson": ["orjson"], "tests": ["pytest"]},
     license="MIT",
     zip_safe=False,
     entry_points="""
@@ -6,12 +6,19 @@ import typing as T
 from pathlib import Path
 
 from celery import Celery
-from celery.signals import setup_logging
+from celery.signals import setup_logging, worker_init
 from flask import Blueprint, Flask
 from flask_injector import FlaskInjector
 
 from . import config, extensions, server
+from .core.download_archive import (
+    BloomFilterDownloadArchiveFactory,
+    DownloadArchiveFactory,
+)
 from .modules import FytdlModule
+from .worker.lanes import DownloadLanes
+
+logger = logging.getLogger(__name__)
 
 
 def make_app(
@@ -98,6 +105,12 @@ def configure_app(
         app_config=app.config, this_config=config.DownloadTaskConfig(), prefix="YTDL_"
     )
 
+    app.config["INFO_CACHE"] = config.hydrate_config_from_app_config(
+        app_config=app.config,
+        this_config=config.InfoCacheConfig(),
+        prefix="INFO_CACHE_",
+    )
+
 
 def configure_logging(app: Flask) -> None:
     log_level = "INFO"
@@ -151,6 +164,11 @@ def configure_celery_app(app: Flask, celery: Celery) -> None:
                 pass
 
     celery_ns.update(app.config.get("CELERY_CONFIG"))
+    lanes = DownloadLanes(app.config["TASK"])
+    celery_ns.setdefault("task_routes", lanes.task_routes())
+    lane_queues = lanes.task_queues(celery_ns.get("task_default_queue", "celery"))
+    if lane_queues is not None:
+        celery_ns.setdefault("task_queues", lane_queues)
     celery.conf.update(celery_ns)
     app.config["CELERY_CONFIG"] = celery_ns
 
@@ -168,6 +186,35 @@ def configure_celery_app(app: Flask, celery: Celery) -> None:
     def configure_logging(*args, **kwargs):
         logging.config.dictConfig(app.config["LOGGING_CONFIG"])
 
+    @worker_init.connect(weak=False)
+    def warm_archive_filters(*args, **kwargs):
+        _warm_archive_filters(app)
+
+
+def _warm_archive_filters(app: Flask) -> None:
+    """
+    Builds the default archive's bloom filter before the worker takes on
+    any downloads. Pool processes forked afterwards start with a copy.
+    """
+    archive_name = app.config["YTDL"].download_archive
+    if not archive_name:
+        return
+
+    with app.app_context():
+        factory = app.injector.get(DownloadArchiveFactory)
+        if not isinstance(factory, BloomFilterDownloadArchiveFactory):
+            return
+
+        try:
+            factory.warm([archive_name])
+        except Exception:
+            # built on the first lookup instead
+            logger.exception(f"Could not build the bloom filter for {archive_name}")
+        finally:
+            # don't hand the connections used to forked pool processes
+            extensions.db.session.remove()
+            extensions.db.engine.dispose()
+
 
 def initialize_extensions(app: Flask) -> None:
     extensions.db.init_app(app)
@@ -8,7 +8,10 @@ from flask import current_app
 from flask.cli import FlaskGroup, ScriptInfo, with_appcontext
 
 from .app import make_app
+from .core.extraction import InfoExtractor
 from .extensions import celery, db
+from .worker.lanes import DownloadLanes, UnknownLane
+from .worker.tasks import sweep_download_slots
 
 try:
     import IPython
@@ -86,7 +89,35 @@ def fytdl(ctx):
 @click.pass_context
 @with_appcontext
 def start_celery(ctx):
-    celery.start(ctx.args)
+    """
+    Runs celery with the app's configuration. Workers can subscribe to
+    download lanes with --lanes fast,bulk,extract,default, see worker.lanes
+    """
+    celery.start(_lanes_to_queues(ctx.args))
+
+
+def _lanes_to_queues(args):
+    lanes = current_app.injector.get(DownloadLanes)
+    translated = []
+    args = iter(args)
+
+    for arg in args:
+        if arg == "--lanes":
+            arg = f"--lanes={next(args, '')}"
+
+        if not arg.startswith("--lanes="):
+            translated.append(arg)
+            continue
+
+        names = [name.strip() for name in arg[8:].split(",") if name.strip()]
+        try:
+            queues = lanes.queues(names, celery.conf.task_default_queue)
+        except UnknownLane as e:
+            raise click.BadParameter(f"Unknown lane {e}", param_hint="--lanes")
+
+        translated.extend(("-Q", ",".join(queues)))
+
+    return translated
 
 
 @fytdl.command("shell", short_help="Runs a shell within an flask-youtubedl context")
@@ -115,3 +146,25 @@ def show_config():
 @with_appcontext
 def create_db():
     db.create_all()
+
+
+@fytdl.command("invalidate-info", short_help="Drops cached extracted info for a url")
+@click.argument("url")
+@with_appcontext
+def invalidate_info(url):
+    """
+    Drops the url from the shared cache. Running processes drop their own
+    copy too when the cache is shared through redis, otherwise they keep it
+    until it expires.
+    """
+    current_app.injector.get(InfoExtractor).invalidate(url)
+
+
+@fytdl.command("sweep-slots", short_help="Moves along stalled download slots")
+@with_appcontext
+def sweep_slots():
+    """
+    Runs worker.tasks.sweep_download_slots here, e.g. from cron when celery
+    beat isn't running it
+    """
+    sweep_download_slots.apply().get()
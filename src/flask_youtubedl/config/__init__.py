@@ -9,4 +9,5 @@ from .find import (
 )
 from .ytdl import YoutubeDlConfiguration, get_youtubedl_config_from_app_config
 from .helpers import hydrate_config_from_app_config
+from .info_cache import InfoCacheConfig
 from .task_config import DownloadTaskConfig
@@ -3,4 +3,25 @@ class DefaultConfiguration:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_COMMIT_ON_TEARDOWN = False
 
-    CELERY_CONFIG = {"broker_transport_options": {"max_retries": 1}}
+    # run metadata extraction as a celery job and answer with 202, requests
+    # can override this with ?async=
+    ASYNC_EXTRACTION = False
+
+    # records written per flush by streaming (?stream=true) endpoints
+    STREAM_CHUNK_SIZE = 50
+
+    # dump responses with precompiled schemas, see core.compiled_schema
+    COMPILED_SCHEMAS = True
+    # "orjson" encodes JSON responses with orjson when it's installed
+    JSON_BACKEND = "json"
+
+    # priorities are 0-9, the redis transport needs a step per priority to
+    # keep them apart. amqp lane queues are declared with a max priority by
+    # worker.lanes, existing queues are left as they are
+    CELERY_CONFIG = {
+        "broker_transport_options": {
+            "max_retries": 1,
+            "priority_steps": list(range(10)),
+            "queue_order_strategy": "priority",
+        },
+    }
@@ -2,13 +2,10 @@ import typing as T
 
 from ..exceptions import FlaskYoutubeDLException
 
-try:
-    str.removeprefix
-    strip_prefix = str.removeprefix
-except AttributeError:
 
-    def strip_prefix(prefix: str, key: str) -> str:
-        return (key[len(prefix) :] if key.startswith(prefix) else key).lower()
+def strip_prefix(prefix: str, key: str) -> str:
+    # not str.removeprefix, its receiver is the key rather than the prefix
+    return (key[len(prefix) :] if key.startswith(prefix) else key).lower()
 
 
 class MissingPrefix(FlaskYoutubeDLException):
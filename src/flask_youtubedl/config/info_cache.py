@@ -0,0 +1,18 @@
+class InfoCacheConfig:
+    enabled: bool = True
+    # seconds an extracted info blob is reused for, stream urls in it expire
+    # so keep this well under a few hours
+    ttl: int = 300
+    # entries kept by the in process tier
+    max_size: int = 256
+    # share entries between web and worker processes through redis
+    redis: bool = False
+    redis_prefix: str = "fytdl:info:"
+    # invalidations are published here so every process drops its own copy
+    invalidation_channel: str = "fytdl:info-invalidations"
+    # with redis enabled, extractions for the same url are also coalesced
+    # across processes by a lock held for at most lock_timeout seconds,
+    # waiters give up and extract themselves after lock_wait seconds
+    lock_prefix: str = "fytdl:lock:info:"
+    lock_timeout: int = 120
+    lock_wait: int = 60
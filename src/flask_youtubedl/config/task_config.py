@@ -2,4 +2,54 @@ import typing as T
 
 
 class DownloadTaskConfig:
+    # failed attempts before a download is blocked
     max_attempts: int = 3
+    # attempts that fail for transient reasons, see core.retry, are retried
+    # by the worker after an exponential backoff from retry_backoff_base
+    # seconds, capped at retry_backoff_max, with full jitter
+    retry_transient: bool = True
+    retry_backoff_base: float = 30.0
+    retry_backoff_max: float = 30 * 60.0
+    # downloads from a single playlist submission that may run at once
+    playlist_concurrency: int = 2
+    # slots of such submissions whose download hasn't changed for this many
+    # seconds are moved along by worker.tasks.sweep_download_slots
+    slot_stale_after: int = 60 * 60
+    # progress events are applied in memory and committed at most every
+    # progress_flush_interval seconds, or sooner once progress_flush_bytes more
+    # have been downloaded. finished and error are always committed at once
+    progress_flush_interval: float = 5.0
+    progress_flush_bytes: int = 16 * 1024 * 1024
+    # publish progress between commits to redis, at most every
+    # progress_live_interval seconds
+    progress_redis: bool = False
+    progress_redis_prefix: str = "fytdl:progress:"
+    progress_redis_ttl: int = 600
+    progress_live_interval: float = 0.5
+    # with progress_redis enabled, progress is also published over pub/sub
+    # for /download/video/<id>/events, which sends a keepalive every
+    # progress_events_keepalive seconds without progress
+    progress_events_prefix: str = "fytdl:progress-events:"
+    progress_events_keepalive: float = 15.0
+    # limits on downloads per extractor, shared by every worker through redis,
+    # see core.rate_limit.RedisDownloadLimiter. rate_limit_per_minute and
+    # rate_limit_burst make a token bucket for downloads started and
+    # rate_limit_concurrency caps downloads running at once, 0 turns either
+    # off. rate_limit_extractors overrides them per extractor, e.g.
+    # {"youtube": {"per_minute": 30, "burst": 5, "concurrency": 4}}
+    rate_limit: bool = False
+    rate_limit_prefix: str = "fytdl:rate-limit:"
+    rate_limit_per_minute: float = 0
+    rate_limit_burst: int = 1
+    rate_limit_concurrency: int = 0
+    rate_limit_extractors: T.Dict[str, T.Dict[str, float]] = {}
+    # a running download holds its slot for at most this many seconds
+    rate_limit_lease_ttl: int = 6 * 60 * 60
+    # seconds a download is deferred by when its extractor is at concurrency
+    rate_limit_busy_countdown: float = 30.0
+    # route downloads and extraction to a lane's queue, see worker.lanes.
+    # off, everything runs on celery's default queue. videos no longer than
+    # fast_lane_max_duration seconds take the fast lane
+    lanes: bool = False
+    lane_queue_prefix: str = "fytdl."
+    fast_lane_max_duration: int = 20 * 60
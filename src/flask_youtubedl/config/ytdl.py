@@ -9,6 +9,31 @@ class YoutubeDlConfiguration:
     download_archive: Optional[str] = None
     base_download_path: str = "/var/run/fytdl/downloads"
     default_output_template: str = DEFAULT_OUTTMPL
+    # bloom filter in front of the download archive, see
+    # core.download_archive.BloomFilterDownloadArchive
+    archive_bloom_filter: bool = False
+    archive_bloom_filter_capacity: int = 1_000_000
+    archive_bloom_filter_error_rate: float = 0.001
+    # seconds between catching up on what other processes recorded, lookups
+    # can miss it until then. 0 catches up before every lookup. the filter
+    # of download_archive is built as workers start
+    archive_bloom_filter_refresh_interval: int = 30
+    # keep YoutubeDL instances around between runs, see
+    # core.ytdl_factory.PooledYoutubeDlFactory. at most pool_max_idle idle
+    # instances are kept per set of options, each for pool_idle_timeout seconds.
+    # off, every run builds its own
+    pool: bool = False
+    pool_max_idle: int = 4
+    pool_idle_timeout: int = 300
+    # DASH and HLS fragments fetched at once, see core.fragments. 1 leaves
+    # youtube-dl to fetch them one after another
+    concurrent_fragments: int = 1
+    # share files between downloads of the same format of the same video, see
+    # core.artifacts.HardlinkArtifactStore. the store defaults to .artifacts
+    # under base_download_path and must be on the same filesystem as the
+    # downloads for them to be hardlinked rather than copied
+    artifact_store: bool = False
+    artifact_store_path: Optional[str] = None
 
 
 def get_youtubedl_config_from_app_config(
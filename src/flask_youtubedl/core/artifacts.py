@@ -0,0 +1,198 @@
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+__all__ = ("ArtifactKey", "ArtifactStore", "HardlinkArtifactStore", "NullArtifactStore")
+
+
+class ArtifactKey:
+    """
+    What a downloaded file is, as far as youtube-dl is concerned: the same
+    format of the same video from the same extractor
+    """
+
+    def __init__(self, extractor: str, video_id: str, format_id: str):
+        self.extractor = extractor
+        self.video_id = video_id
+        self.format_id = format_id
+
+    def __repr__(self) -> str:
+        return f"ArtifactKey({self.extractor!r}, {self.video_id!r}, {self.format_id!r})"
+
+
+class ArtifactStore(ABC):
+    """
+    Downloaded files shared between every download that resolves to the
+    same artifact
+    """
+
+    @abstractmethod
+    def place(self, key: ArtifactKey, destination: str) -> Optional[int]:
+        """
+        Puts the artifact at destination if it's stored, returning its size,
+        otherwise None
+        """
+        NotImplemented
+
+    @abstractmethod
+    def add(self, key: ArtifactKey, path: str) -> None:
+        """
+        Stores the file at path as the artifact
+        """
+        NotImplemented
+
+
+class NullArtifactStore(ArtifactStore):
+    def place(self, key: ArtifactKey, destination: str) -> Optional[int]:
+        return None
+
+    def add(self, key: ArtifactKey, path: str) -> None:
+        pass
+
+
+class HardlinkArtifactStore(ArtifactStore):
+    """
+    Content addressed store on the download filesystem. Files are kept once
+    per content hash under objects/ and keys/ maps each artifact to its
+    hash. Placing an artifact hardlinks its object to the destination, so
+    every download of it shares one copy on disk. Adding a file whose
+    content is already stored replaces it with a link to the stored copy.
+
+    Destinations on another filesystem get a copy instead. Objects are
+    removed only once nothing links to them, e.g. by a periodic sweep of
+    objects with a link count of 1.
+    """
+
+    _CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, root: str):
+        self._root = Path(root)
+
+    def place(self, key: ArtifactKey, destination: str) -> Optional[int]:
+        obj = self._lookup(key)
+
+        if obj is None:
+            return None
+
+        size = obj.stat().st_size
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        if destination.exists():
+            if destination.samefile(obj):
+                return size
+            destination.unlink()
+
+        _link_or_copy(obj, destination)
+        logger.info(f"Placed stored {key!r} at {destination}")
+        return size
+
+    def add(self, key: ArtifactKey, path: str) -> None:
+        path = Path(path)
+        digest = self._hash(path)
+        obj = self._object_path(digest)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+
+        if obj.exists():
+            if not path.samefile(obj):
+                # already stored for another artifact, keep a single copy
+                _replace_with_link(obj, path)
+                logger.info(f"{path} duplicates stored {digest}, linked")
+        else:
+            try:
+                os.link(path, obj)
+            except FileExistsError:
+                # stored by someone else in the meantime
+                _replace_with_link(obj, path)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.copy2(path, obj)
+
+        self._write_key(key, digest)
+
+    def _lookup(self, key: ArtifactKey) -> Optional[Path]:
+        try:
+            with self._key_path(key).open() as fh:
+                stored = json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.exception(f"Could not read stored {key!r}")
+            return None
+
+        obj = self._object_path(stored["sha256"])
+
+        # removed from under us or truncated, download it again
+        if not obj.is_file() or obj.stat().st_size != stored["size"]:
+            return None
+
+        return obj
+
+    def _write_key(self, key: ArtifactKey, digest: str) -> None:
+        key_path = self._key_path(key)
+        key_path.parent.mkdir(parents=True, exist_ok=True)
+        size = self._object_path(digest).stat().st_size
+
+        tmp = key_path.with_name(f"{key_path.name}.{uuid4().hex}.tmp")
+        tmp.write_text(json.dumps({"sha256": digest, "size": size}))
+        os.replace(tmp, key_path)
+
+    def _hash(self, path: Path) -> str:
+        digest = hashlib.sha256()
+        with path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(self._CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _object_path(self, digest: str) -> Path:
+        return self._root / "objects" / digest[:2] / digest
+
+    def _key_path(self, key: ArtifactKey) -> Path:
+        return (
+            self._root
+            / "keys"
+            / _component(key.extractor)
+            / _component(key.video_id)
+            / f"{_component(key.format_id)}.json"
+        )
+
+
+def _component(value: str) -> str:
+    # ids can hold anything, e.g. slashes, and are often case sensitive. the
+    # digest keeps ids differing only by case apart on filesystems that
+    # aren't
+    value = str(value)
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{quote(value, safe='')}-{digest}"
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    try:
+        os.link(source, destination)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        shutil.copy2(source, destination)
+
+
+def _replace_with_link(source: Path, destination: Path) -> None:
+    tmp = destination.with_name(f".{destination.name}.{uuid4().hex}")
+    try:
+        os.link(source, tmp)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        # can't share it, leave the duplicate be
+        return
+    os.replace(tmp, destination)
@@ -0,0 +1,194 @@
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Callable, List, Tuple, Type
+
+from marshmallow import Schema, ValidationError, fields as ma_fields, missing, utils
+
+__all__ = ("cached_schema", "compile_dump", "dump")
+
+DUMP_TYPE = Callable[[Any], Any]
+
+
+def cached_schema(schema_cls: Type[Schema], **kwargs) -> Schema:
+    """
+    Shares schema instances between every caller asking for the same schema
+    and options, building one costs far more than dumping with it. Options
+    can come from requests, so only the most recently used are kept.
+    """
+    return _cached_schema(schema_cls, _freeze(kwargs))
+
+
+@lru_cache(maxsize=256)
+def _cached_schema(schema_cls: Type[Schema], kwargs: Tuple) -> Schema:
+    return schema_cls(**dict(kwargs))
+
+
+def _freeze(kwargs) -> Tuple:
+    return tuple(
+        sorted(
+            (k, tuple(v) if isinstance(v, (list, set, frozenset)) else v)
+            for (k, v) in kwargs.items()
+        )
+    )
+
+
+def dump(schema: Schema, obj: Any) -> Any:
+    """
+    Same output as schema.dump(obj).data using the schema's compiled dump
+    """
+    compiled = schema.__dict__.get("_compiled_dump")
+
+    if compiled is None:
+        compiled = schema._compiled_dump = compile_dump(schema)
+
+    return compiled(obj)
+
+
+def compile_dump(schema: Schema) -> DUMP_TYPE:
+    """
+    Resolves everything marshmallow's dump looks up per object and per field
+    -- which fields are dumped, under which key, how each value is read and
+    which nested schemas are used -- once, and returns a function that only
+    reads attributes and formats values.
+
+    Schemas with processors or a custom get_attribute are dumped by
+    marshmallow itself, as is any object a field fails to format so the
+    errors are reported the usual way.
+    """
+    if not _compilable(schema):
+        return lambda obj: schema.dump(obj).data
+
+    dump_one = _compile_one(schema)
+
+    def dump_compiled(obj):
+        try:
+            if schema.many:
+                return [dump_one(each) for each in obj]
+            return dump_one(obj)
+        except ValidationError:
+            return schema.dump(obj).data
+
+    return dump_compiled
+
+
+def _compilable(schema: Schema) -> bool:
+    return (
+        not schema._has_processors
+        and type(schema).get_attribute is Schema.get_attribute
+    )
+
+
+def _compile_one(schema: Schema) -> DUMP_TYPE:
+    prefix = schema.prefix or ""
+    writers: List[Tuple[str, Callable[[Any], Any]]] = [
+        (f"{prefix}{field.dump_to or name}", _compile_field(schema, name, field))
+        for (name, field) in schema.fields.items()
+        if not field.load_only
+    ]
+
+    def dump_one(obj):
+        data = {}
+        for (key, write) in writers:
+            value = write(obj)
+            if value is not missing:
+                data[key] = value
+        return data
+
+    return dump_one
+
+
+def _compile_field(schema: Schema, name: str, field: ma_fields.Field) -> DUMP_TYPE:
+    if not field._CHECK_ATTRIBUTE:
+        # e.g. Method and Function fields which compute their own value
+        return lambda obj: field.serialize(name, obj, accessor=schema.get_attribute)
+
+    read = _compile_reader(field.attribute or name)
+    default = getattr(field, "default", missing)
+    format_value = _compile_formatter(name, field)
+
+    def write(obj):
+        value = read(obj)
+        if value is missing:
+            return default() if callable(default) else default
+        return format_value(value, obj)
+
+    return write
+
+
+def _compile_reader(attr: str) -> DUMP_TYPE:
+    if "." in attr:
+        return lambda obj: utils.get_value(attr, obj, missing)
+
+    def read(obj):
+        if type(obj) is dict:
+            return obj.get(attr, missing)
+
+        value = getattr(obj, attr, missing)
+
+        if value is missing and isinstance(obj, Mapping):
+            return obj.get(attr, missing)
+
+        # matches marshmallow, which calls whatever callable it finds
+        return value() if callable(value) else value
+
+    return read
+
+
+def _compile_formatter(name: str, field: ma_fields.Field):
+    if (
+        isinstance(field, ma_fields.Nested)
+        and not isinstance(field.only, str)
+        and _compilable(field.schema)
+    ):
+        nested = field.schema
+        many = nested.many or field.many
+        # compiled on first use, schemas can nest each other
+        dump_nested = None
+
+        def format_nested(value, obj):
+            nonlocal dump_nested
+            if value is None:
+                return None
+            if dump_nested is None:
+                dump_nested = _compile_one(nested)
+            if many:
+                return [dump_nested(each) for each in value]
+            return dump_nested(value)
+
+        return format_nested
+
+    if isinstance(field, ma_fields.List) and not field.container.attribute:
+        format_each = _compile_formatter(name, field.container)
+        return lambda value, obj: (
+            None
+            if value is None
+            else [format_each(each, obj) for each in _as_collection(value)]
+        )
+
+    # values that are already what the field would format them into are
+    # passed through as is, which is what most column values are
+    passthrough = _passthrough_type(field)
+
+    def format_value(value, obj):
+        if type(value) is passthrough:
+            return value
+        return field._serialize(value, name, obj)
+
+    return format_value
+
+
+def _passthrough_type(field: ma_fields.Field):
+    field_type = type(field)
+    if field_type is ma_fields.String:
+        return str
+    if field_type is ma_fields.Integer and not field.as_string:
+        return int
+    if field_type is ma_fields.Float and not field.as_string:
+        return float
+    if field_type is ma_fields.Boolean:
+        return bool
+    return None
+
+
+def _as_collection(value):
+    return value if utils.is_collection(value) else [value]
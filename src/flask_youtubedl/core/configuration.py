@@ -5,6 +5,7 @@ from injector import inject
 from youtube_dl.utils import DEFAULT_OUTTMPL
 
 from ..config import YoutubeDlConfiguration
+from .fragments import CONCURRENCY_PARAM
 
 
 class OptionsFactory(ABC):
@@ -35,3 +36,6 @@ class OptionsFixer(OptionsFactory):
         video_options.setdefault(
             "download_archive", self._configuration.download_archive
         )
+        video_options.setdefault(
+            CONCURRENCY_PARAM, int(self._configuration.concurrent_fragments)
+        )
@@ -1,19 +1,45 @@
 import errno
 import io
+import logging
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
 from collections import defaultdict
-from typing import Dict, MutableSet
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableSet,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from injector import ClassAssistedBuilder, inject
 from redis import Redis
-from youtube_dl.utils import locked_file
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from youtube_dl.utils import PagedList, locked_file
+
+from ..models import DownloadArchiveEntry
+from .bloom_filter import BloomFilter
+from .utils import batched
 
-## eventually supply a sqlalchemy backed archive
+logger = logging.getLogger(__name__)
 
 __all__ = (
     "DownloadArchive",
     "SetDownloadArchive",
     "LockedFileDownloadArchive",
+    "IndexedFileDownloadArchive",
+    "RedisDownloadArchive",
+    "SqlAlchemyDownloadArchive",
+    "BloomFilterDownloadArchive",
     "UseArchiveMixin",
 )
 
@@ -27,6 +53,34 @@ class DownloadArchive(ABC):
     def exists(self, archive_name, vid):
         NotImplemented
 
+    def exists_many(self, archive_name, vids: Iterable[str]) -> Set[str]:
+        """
+        Returns the subset of vids that are in the archive. Backends that can
+        answer this in fewer round trips should override it.
+        """
+        return {vid for vid in vids if self.exists(archive_name, vid)}
+
+    def add_many(self, archive_name, vids: Iterable[str]) -> None:
+        for vid in vids:
+            self.add(archive_name, vid)
+
+    @abstractmethod
+    def iter_archive(self, archive_name) -> Iterator[str]:
+        """
+        Yields every vid recorded in the archive
+        """
+        NotImplemented
+
+    def changes_since(
+        self, archive_name, cursor: Any
+    ) -> Optional[Tuple[List[str], Any]]:
+        """
+        The vids recorded after cursor, along with the cursor to pass next
+        time. A cursor of None means from the start of the archive. Returns
+        None when the archive can't tell what was recorded since.
+        """
+        return None
+
 
 class SetDownloadArchive(DownloadArchive):
     def __init__(self, archives: Dict[str, Dict[str, MutableSet[str]]] = None):
@@ -44,12 +98,19 @@ class SetDownloadArchive(DownloadArchive):
         (extractor, id) = vid.split(" ", 1)
         return id in self._archives[archive_name][extractor]
 
+    def iter_archive(self, archive_name) -> Iterator[str]:
+        for extractor, ids in list(self._archives[archive_name].items()):
+            for id in list(ids):
+                yield f"{extractor} {id}"
+
     @staticmethod
     def _archive_factory():
         return defaultdict(set)
 
 
 class LockedFileDownloadArchive(DownloadArchive):
+    _encoding = "utf-8"
+
     def exists(self, archive_name, vid):
         try:
             with self._get_locked_file(archive_name, "r") as fh:
@@ -65,25 +126,626 @@ class LockedFileDownloadArchive(DownloadArchive):
         with self._get_locked_file(archive_name, "a") as fh:
             fh.write(vid + "\n")
 
+    def add_many(self, archive_name, vids: Iterable[str]) -> None:
+        lines = "".join(f"{vid}\n" for vid in vids)
+        if not lines:
+            return
+
+        with self._get_locked_file(archive_name, "a") as fh:
+            fh.write(lines)
+
+    def iter_archive(self, archive_name) -> Iterator[str]:
+        try:
+            with self._get_locked_file(archive_name, "r") as fh:
+                lines = [line.strip() for line in fh]
+        except IOError as ioe:
+            if ioe.errno != errno.ENOENT:
+                raise
+            return
+
+        yield from (line for line in lines if line)
+
+    def changes_since(
+        self, archive_name, cursor: Any
+    ) -> Optional[Tuple[List[str], Any]]:
+        # the cursor is the file's inode and how far into it has been read
+        try:
+            stat = os.stat(archive_name)
+        except FileNotFoundError:
+            return [], None
+
+        inode, offset = cursor if cursor is not None else (None, 0)
+        if stat.st_ino != inode or stat.st_size < offset:
+            # replaced or truncated, start over
+            offset = 0
+
+        try:
+            lines, offset = self._read_appended(archive_name, offset)
+        except IOError as ioe:
+            if ioe.errno != errno.ENOENT:
+                raise
+            return [], None
+
+        return lines, (stat.st_ino, offset)
+
+    def _read_appended(self, archive_name, offset: int) -> Tuple[List[str], int]:
+        """
+        The complete lines appended past offset and the offset right after
+        them. Offsets count bytes on disk, whatever the line endings.
+        """
+        with self._get_locked_file(archive_name, "r", self._encoding) as fh:
+            # locked_file only opens text files, which translate line endings
+            # and can't seek to arbitrary offsets, read the bytes underneath
+            raw = fh.f.buffer
+            raw.seek(offset)
+            appended = raw.read()
+
+        # a writer that doesn't respect the lock may leave a partial line
+        # behind, leave it for the next read
+        complete = appended[: appended.rfind(b"\n") + 1]
+        lines = complete.decode(self._encoding).splitlines()
+        return [line.strip() for line in lines if line.strip()], offset + len(complete)
+
     def _get_locked_file(self, filename, mode, encoding="utf-8"):
         return locked_file(filename, mode, encoding)
 
 
+class _FileArchiveIndex:
+    """
+    In memory view of an archive file, tracks how far into the file has been
+    read so appends from other processes can be picked up incrementally
+    """
+
+    def __init__(self):
+        self.entries = set()
+        self.offset = 0
+        self.mtime = None
+        self.inode = None
+
+    def reset(self):
+        self.entries = set()
+        self.offset = 0
+        self.mtime = None
+        self.inode = None
+
+
+class IndexedFileDownloadArchive(LockedFileDownloadArchive):
+    """
+    File archive that keeps each archive file indexed in a set. Every lookup
+    stats the file and only reads whatever has been appended since the last
+    lookup, so lookups are O(1) rather than a full scan of the file. If the
+    file is replaced or truncated the index is rebuilt from scratch.
+
+    Instances are meant to be shared so the index survives between downloads.
+    """
+
+    def __init__(self, encoding="utf-8"):
+        self._encoding = encoding
+        self._indexes: Dict[str, _FileArchiveIndex] = defaultdict(_FileArchiveIndex)
+        self._lock = threading.Lock()
+
+    def exists(self, archive_name, vid):
+        with self._lock:
+            index = self._refresh(archive_name)
+            return vid in index.entries
+
+    def add(self, archive_name, vid):
+        self.add_many(archive_name, [vid])
+
+    def add_many(self, archive_name, vids: Iterable[str]) -> None:
+        vids = list(vids)
+        super().add_many(archive_name, vids)
+        with self._lock:
+            # the lines themselves are read back in by the next refresh, this
+            # just makes them visible immediately
+            self._indexes[archive_name].entries.update(vids)
+
+    def iter_archive(self, archive_name) -> Iterator[str]:
+        with self._lock:
+            entries = list(self._refresh(archive_name).entries)
+        yield from entries
+
+    def _refresh(self, archive_name) -> _FileArchiveIndex:
+        index = self._indexes[archive_name]
+        stat = self._stat(archive_name)
+
+        if stat is None:
+            index.reset()
+            return index
+
+        if stat.st_ino != index.inode or stat.st_size < index.offset:
+            index.reset()
+            index.inode = stat.st_ino
+
+        if stat.st_size == index.offset and stat.st_mtime == index.mtime:
+            return index
+
+        try:
+            lines, index.offset = self._read_appended(archive_name, index.offset)
+        except IOError as ioe:
+            if ioe.errno != errno.ENOENT:
+                raise
+            index.reset()
+            return index
+
+        index.entries.update(lines)
+        index.mtime = stat.st_mtime
+        return index
+
+    @staticmethod
+    def _stat(archive_name) -> Optional[os.stat_result]:
+        try:
+            return os.stat(archive_name)
+        except FileNotFoundError:
+            return None
+
+
 class RedisDownloadArchive(DownloadArchive):
+    """
+    Keeps each archive in a set. Every vid added is also appended to a list
+    next to it, which is what changes_since reads. Vids are appended
+    whenever they're added, recorded already or not, and the list is never
+    trimmed, it grows along with the archive.
+    """
+
     def __init__(self, redis_conn: Redis):
         self._conn = redis_conn
 
     def add(self, archive_name, vid):
-        self._conn.sadd(archive_name, vid)
+        self.add_many(archive_name, [vid])
 
     def exists(self, archive_name, vid):
         return self._conn.sismember(archive_name, vid)
 
+    def add_many(self, archive_name, vids: Iterable[str]) -> None:
+        vids = list(vids)
+        if not vids:
+            return
+
+        pipeline = self._conn.pipeline(transaction=True)
+        pipeline.sadd(archive_name, *vids)
+        pipeline.rpush(self._changes_key(archive_name), *vids)
+        pipeline.execute()
+
+    def exists_many(self, archive_name, vids: Iterable[str]) -> Set[str]:
+        vids = list(vids)
+        if not vids:
+            return set()
+
+        # SMISMEMBER needs redis 6.2 and a newer client, a non-transactional
+        # pipeline gets the same single round trip
+        pipeline = self._conn.pipeline(transaction=False)
+        for vid in vids:
+            pipeline.sismember(archive_name, vid)
+
+        return {vid for (vid, found) in zip(vids, pipeline.execute()) if found}
+
+    def iter_archive(self, archive_name) -> Iterator[str]:
+        for vid in self._conn.sscan_iter(archive_name, count=1000):
+            yield _decode(vid)
+
+    def changes_since(
+        self, archive_name, cursor: Any
+    ) -> Optional[Tuple[List[str], Any]]:
+        # the cursor is how much of the changes list has been read
+        changes_key = self._changes_key(archive_name)
+
+        if cursor is not None:
+            pipeline = self._conn.pipeline(transaction=True)
+            pipeline.llen(changes_key)
+            pipeline.lrange(changes_key, cursor, -1)
+            (length, appended) = pipeline.execute()
+
+            if length >= cursor:
+                return [_decode(vid) for vid in appended], cursor + len(appended)
+
+        # whatever is added after the length is read is read next time,
+        # anything before it is in the set. the list is only read from there
+        # on, archives recorded before it existed are still read in full
+        length = self._conn.llen(changes_key)
+        return list(self.iter_archive(archive_name)), length
+
+    @staticmethod
+    def _changes_key(archive_name) -> str:
+        return f"{archive_name}:changes"
+
+
+def _decode(vid) -> str:
+    return vid.decode("utf-8") if isinstance(vid, bytes) else vid
+
+
+class SqlAlchemyDownloadArchive(DownloadArchive):
+    # keep IN (...) lists well under the bound parameter limits of every
+    # backend we care about
+    BATCH_SIZE = 500
+    GAP_TIMEOUT = 300
+
+    def __init__(self, session: Session):
+        self._session = session
+
+    def add(self, archive_name, vid):
+        # write through the engine so recording an entry neither commits nor
+        # rolls back whatever the caller has pending on the session
+        try:
+            self._insert(archive_name, [vid])
+        except IntegrityError:
+            # already recorded, possibly by another worker
+            pass
+
+    def add_many(self, archive_name, vids: Iterable[str]) -> None:
+        vids = set(vids)
+        missing = vids - self.exists_many(archive_name, vids)
+
+        if not missing:
+            return
+
+        try:
+            self._insert(archive_name, missing)
+        except IntegrityError:
+            # lost a race with another writer, fall back to row at a time so
+            # the entries that are actually missing still get recorded
+            for vid in missing:
+                self.add(archive_name, vid)
+
+    def _insert(self, archive_name, vids: Iterable[str]) -> None:
+        rows = []
+        for vid in vids:
+            (extractor, id) = vid.split(" ", 1)
+            rows.append(
+                {
+                    "archive_name": archive_name,
+                    "extractor": extractor,
+                    "video_id": id,
+                }
+            )
+
+        with self._session.get_bind().begin() as conn:
+            conn.execute(DownloadArchiveEntry.__table__.insert(), rows)
+
+    def exists(self, archive_name, vid):
+        (extractor, id) = vid.split(" ", 1)
+        query = self._session.query(DownloadArchiveEntry.id).filter(
+            DownloadArchiveEntry.archive_name == archive_name,
+            DownloadArchiveEntry.extractor == extractor,
+            DownloadArchiveEntry.video_id == id,
+        )
+        return self._session.query(query.exists()).scalar()
+
+    def exists_many(self, archive_name, vids: Iterable[str]) -> Set[str]:
+        by_extractor = defaultdict(set)
+        for vid in vids:
+            (extractor, id) = vid.split(" ", 1)
+            by_extractor[extractor].add(id)
+
+        found = set()
+
+        for extractor, ids in by_extractor.items():
+            for batch in batched(ids, self.BATCH_SIZE):
+                rows = self._session.query(DownloadArchiveEntry.video_id).filter(
+                    DownloadArchiveEntry.archive_name == archive_name,
+                    DownloadArchiveEntry.extractor == extractor,
+                    DownloadArchiveEntry.video_id.in_(batch),
+                )
+                found.update(f"{extractor} {id}" for (id,) in rows)
+
+        return found
+
+    def changes_since(
+        self, archive_name, cursor: Any
+    ) -> Optional[Tuple[List[str], Any]]:
+        # the cursor is the highest id seen and the ids below it that weren't
+        # there yet. ids are handed out before their rows commit, so missing
+        # ids are looked for again until GAP_TIMEOUT seconds after they were
+        # first skipped, ids of rolled back rows never show up
+        (last_id, gaps) = cursor if cursor is not None else (0, {})
+        now = time.monotonic()
+        gaps = {
+            id: seen for (id, seen) in gaps.items() if now - seen < self.GAP_TIMEOUT
+        }
+
+        # every archive's rows, the gaps are in the ids of the whole table
+        table = DownloadArchiveEntry
+        rows = (
+            self._session.query(
+                table.id, table.archive_name, table.extractor, table.video_id
+            )
+            .filter(or_(table.id > last_id, table.id.in_(list(gaps))))
+            .order_by(table.id)
+            .yield_per(self.BATCH_SIZE)
+        )
+
+        vids = []
+        for (id, name, extractor, video_id) in rows:
+            if name == archive_name:
+                vids.append(f"{extractor} {video_id}")
+
+            gaps.pop(id, None)
+            if id > last_id:
+                gaps.update((skipped, now) for skipped in range(last_id + 1, id))
+                last_id = id
+
+        return vids, (last_id, gaps)
+
+    def iter_archive(self, archive_name) -> Iterator[str]:
+        rows = (
+            self._session.query(
+                DownloadArchiveEntry.extractor, DownloadArchiveEntry.video_id
+            )
+            .filter(DownloadArchiveEntry.archive_name == archive_name)
+            .yield_per(self.BATCH_SIZE)
+        )
+        for (extractor, id) in rows:
+            yield f"{extractor} {id}"
+
+
+class _ArchiveFilter:
+    def __init__(self, bloom: Optional[BloomFilter], cursor: Any):
+        self.bloom = bloom
+        self.cursor = cursor
+        self.caught_up_at = time.monotonic()
+
+    def add(self, vids: Iterable[str]) -> None:
+        # vids are seen again when catching up on what this process added,
+        # only count them once so the filter isn't considered full early
+        for vid in vids:
+            if vid not in self.bloom:
+                self.bloom.add(vid)
+
+    def is_full(self) -> bool:
+        return len(self.bloom) > self.bloom.capacity
+
+
+class ArchiveBloomFilters:
+    """
+    Per archive bloom filters shared between every BloomFilterDownloadArchive
+    a factory hands out. A filter is built from the underlying archive the
+    first time an archive is looked up, or ahead of that with warm, and is
+    rebuilt with room to spare once it holds more than it was sized for.
+
+    Lookups are answered from the filter alone. What this process records
+    is added to it right away, what other processes record is caught up on
+    through the archive's changes_since at most every refresh_interval
+    seconds, so until then lookups may miss it. A refresh_interval of 0
+    catches up before every lookup. Archives that can't report their
+    changes get no filter, lookups go straight to them.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, refresh_interval: int):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._refresh_interval = refresh_interval
+        self._filters: Dict[str, _ArchiveFilter] = {}
+        # vids added while a filter is being rebuilt, for the rebuilt one
+        self._building: Dict[str, List[str]] = {}
+        self._build_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    def warm(self, archive_name, archive: DownloadArchive) -> None:
+        """
+        Builds the archive's filter now rather than on its first lookup
+        """
+        self._get(archive_name, archive)
+
+    def might_contain(
+        self, archive_name, archive: DownloadArchive, vids: Iterable[str]
+    ) -> Set[str]:
+        """
+        The vids that may be in the archive, any others aren't as of the
+        last catch up
+        """
+        entry = self._get(archive_name, archive)
+
+        if entry.bloom is None:
+            return set(vids)
+
+        if self._claim_catch_up(entry):
+            self._catch_up(archive_name, archive, entry)
+
+        with self._lock:
+            return {vid for vid in vids if vid in entry.bloom}
+
+    def add(self, archive_name, vids: Iterable[str]) -> None:
+        with self._lock:
+            entry = self._filters.get(archive_name)
+            if entry is None or entry.bloom is None:
+                return
+
+            vids = list(vids)
+            entry.add(vids)
+
+            if (building := self._building.get(archive_name)) is not None:
+                building.extend(vids)
+
+    def _claim_catch_up(self, entry: _ArchiveFilter) -> bool:
+        # claimed up front so concurrent lookups don't all query the archive
+        with self._lock:
+            now = time.monotonic()
+            if now - entry.caught_up_at < self._refresh_interval:
+                return False
+            entry.caught_up_at = now
+            return True
+
+    def _catch_up(
+        self, archive_name, archive: DownloadArchive, entry: _ArchiveFilter
+    ) -> None:
+        try:
+            changes = archive.changes_since(archive_name, entry.cursor)
+        except Exception:
+            # answered from what's known, caught up on next time
+            logger.exception(f"Could not catch up on changes to {archive_name}")
+            return
+
+        if changes is None:
+            return
+
+        with self._lock:
+            (recorded, entry.cursor) = changes
+            entry.add(recorded)
+
+    def _get(self, archive_name, archive: DownloadArchive) -> _ArchiveFilter:
+        entry = self._filters.get(archive_name)
+        if entry is not None and not self._needs_rebuild(entry):
+            return entry
+
+        with self._lock:
+            build_lock = self._build_locks[archive_name]
+
+        # one build per archive at a time, lookups and adds carry on with the
+        # previous filter in the meantime
+        with build_lock:
+            entry = self._filters.get(archive_name)
+            if entry is not None and not self._needs_rebuild(entry):
+                return entry
+
+            with self._lock:
+                self._building[archive_name] = []
+
+            try:
+                built = self._build(archive_name, archive, previous=entry)
+            finally:
+                with self._lock:
+                    added = self._building.pop(archive_name)
+
+            with self._lock:
+                if built.bloom is not None:
+                    built.add(added)
+                self._filters[archive_name] = built
+
+            return built
+
+    def _needs_rebuild(self, entry: _ArchiveFilter) -> bool:
+        return entry.bloom is not None and entry.is_full()
+
+    def _build(
+        self,
+        archive_name,
+        archive: DownloadArchive,
+        previous: Optional[_ArchiveFilter],
+    ) -> _ArchiveFilter:
+        changes = archive.changes_since(archive_name, None)
+
+        if changes is None:
+            logger.info(
+                f"{type(archive).__name__} can't report its changes, "
+                f"not filtering lookups of {archive_name}"
+            )
+            return _ArchiveFilter(None, None)
+
+        (entries, cursor) = changes
+        entries = set(entries)
+        # leave headroom so the error rate holds for a while
+        capacity = max(self._capacity, 2 * len(entries))
+
+        if previous is not None and previous.bloom is not None:
+            capacity = max(capacity, 2 * previous.bloom.capacity)
+
+        built = _ArchiveFilter(BloomFilter(capacity, self._error_rate), cursor)
+        built.add(entries)
+        logger.info(f"Built a bloom filter of {len(entries)} ids for {archive_name}")
+        return built
+
+
+class BloomFilterDownloadArchive(DownloadArchive):
+    """
+    Answers lookups for ids that were never recorded without asking the
+    wrapped archive for each of them, only ids the filter might contain are
+    passed through. Ids recorded by other processes are caught up on every
+    so often, see ArchiveBloomFilters.
+    """
+
+    def __init__(self, archive: DownloadArchive, filters: ArchiveBloomFilters):
+        self._archive = archive
+        self._filters = filters
+
+    def add(self, archive_name, vid):
+        self._archive.add(archive_name, vid)
+        self._filters.add(archive_name, [vid])
+
+    def add_many(self, archive_name, vids: Iterable[str]) -> None:
+        vids = list(vids)
+        self._archive.add_many(archive_name, vids)
+        self._filters.add(archive_name, vids)
+
+    def exists(self, archive_name, vid):
+        if not self._filters.might_contain(archive_name, self._archive, [vid]):
+            return False
+        return self._archive.exists(archive_name, vid)
+
+    def exists_many(self, archive_name, vids: Iterable[str]) -> Set[str]:
+        candidates = self._filters.might_contain(archive_name, self._archive, vids)
+
+        if not candidates:
+            return set()
+
+        return self._archive.exists_many(archive_name, candidates)
+
+    def changes_since(
+        self, archive_name, cursor: Any
+    ) -> Optional[Tuple[List[str], Any]]:
+        return self._archive.changes_since(archive_name, cursor)
+
+    def iter_archive(self, archive_name) -> Iterator[str]:
+        return self._archive.iter_archive(archive_name)
+
 
 class UseArchiveMixin:
     def __init__(self, *args, archive=None, **kwargs):
         super().__init__(*args, **kwargs)
         self._dl_archive = archive or LockedFileDownloadArchive()
+        # results of batch lookups made ahead of processing a playlist
+        self._archive_precheck: Dict[str, bool] = {}
+
+    def process_ie_result(self, ie_result, download=True, extra_info={}):
+        if ie_result.get("_type", "video") in ("playlist", "multi_video"):
+            if self.params.get("download_archive"):
+                ie_result["entries"] = self._list_entries(ie_result.get("entries"))
+            self.precheck_download_archive(ie_result.get("entries"))
+        return super().process_ie_result(ie_result, download, extra_info)
+
+    def precheck_download_archive(self, entries) -> None:
+        """
+        Looks up every entry of a playlist in one batch so processing the
+        playlist doesn't cost a round trip to the archive per entry. Only
+        listed entries are looked up, see _list_entries.
+        """
+        archive = self.params.get("download_archive")
+        if not archive or not isinstance(entries, (list, tuple)):
+            return
+
+        vids = {
+            vid
+            for entry in entries
+            if entry and (vid := self._make_archive_id(entry))
+        }
+        vids.difference_update(self._archive_precheck)
+
+        if not vids:
+            return
+
+        found = self._dl_archive.exists_many(archive, vids)
+        self._archive_precheck.update((vid, vid in found) for vid in vids)
+
+    def _list_entries(self, entries):
+        """
+        youtube-dl lists lazily paged entries, e.g. of channels, up to
+        playlistend before processing any of them. Listing them here the
+        same way lets them be prechecked. Entries picked with playlist_items
+        are left alone, those can count from the end of the whole playlist.
+        """
+        if entries is None or isinstance(entries, (list, tuple)):
+            return entries
+
+        if self.params.get("playlist_items") is not None:
+            return entries
+
+        playlistend = self.params.get("playlistend")
+        if playlistend == -1:
+            playlistend = None
+
+        if isinstance(entries, PagedList):
+            return entries.getslice(0, playlistend)
+
+        return list(islice(entries, 0, playlistend))
 
     def in_download_archive(self, info_dict):
         archive = self.params.get("download_archive")
@@ -91,7 +753,13 @@ class UseArchiveMixin:
             return False
 
         vid = self._make_archive_id(info_dict)
-        return vid and self._dl_archive.exists(archive, vid)
+        if not vid:
+            return False
+
+        if vid in self._archive_precheck:
+            return self._archive_precheck[vid]
+
+        return self._dl_archive.exists(archive, vid)
 
     def record_download_archive(self, info_dict):
         archive = self.params.get("download_archive")
@@ -101,6 +769,7 @@ class UseArchiveMixin:
         vid = self._make_archive_id(info_dict)
         if vid:
             self._dl_archive.add(archive, vid)
+            self._archive_precheck[vid] = True
 
 
 class DownloadArchiveFactory(ABC):
@@ -124,3 +793,35 @@ class RedisDownloadArchiveFactory(DownloadArchiveFactory):
 
     def get(self) -> DownloadArchiveFactory:
         return RedisDownloadArchive(self._redis_factory.build())
+
+
+class SqlAlchemyDownloadArchiveFactory(DownloadArchiveFactory):
+    @inject
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    def get(self) -> DownloadArchive:
+        return SqlAlchemyDownloadArchive(self._session)
+
+
+class BloomFilterDownloadArchiveFactory(DownloadArchiveFactory):
+    def __init__(
+        self,
+        archive_factory: DownloadArchiveFactory,
+        capacity: int,
+        error_rate: float,
+        refresh_interval: int,
+    ) -> None:
+        self._archive_factory = archive_factory
+        self._filters = ArchiveBloomFilters(capacity, error_rate, refresh_interval)
+
+    def get(self) -> DownloadArchive:
+        return BloomFilterDownloadArchive(self._archive_factory.get(), self._filters)
+
+    def warm(self, archive_names: Iterable[str]) -> None:
+        """
+        Builds the filters of the archives ahead of their first lookup
+        """
+        archive = self._archive_factory.get()
+        for archive_name in archive_names:
+            self._filters.warm(archive_name, archive)
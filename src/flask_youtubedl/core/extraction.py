@@ -0,0 +1,150 @@
+import json
+import logging
+from contextlib import ExitStack
+from itertools import count
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from injector import inject
+from youtube_dl.utils import PagedList
+
+from .info_cache import InfoCache
+from .single_flight import SingleFlight
+from .ytdl_factory import YtdlFactory
+
+logger = logging.getLogger(__name__)
+
+__all__ = ("InfoExtractor",)
+
+
+class InfoExtractor:
+    """
+    Runs youtube-dl metadata extraction without downloading anything. Shared
+    by the web views and the worker so extraction can run in either.
+
+    Results are cached by url and concurrent extractions of the same url are
+    coalesced into one. Extractions run with extra youtube-dl params bypass
+    both since those params can change what gets extracted.
+    """
+
+    @inject
+    def __init__(
+        self, ytdl_factory: YtdlFactory, cache: InfoCache, single_flight: SingleFlight
+    ):
+        self._ytdl_factory = ytdl_factory
+        self._cache = cache
+        self._single_flight = single_flight
+
+    def extract(self, url: str, **params: Any) -> Dict[str, Any]:
+        if params:
+            return self._extract(url, **params)
+
+        # every caller gets its own copy, youtube-dl mutates what it processes
+        return json.loads(self.extract_serialized(url))
+
+    def extract_serialized(self, url: str) -> str:
+        """
+        Same as extract but hands back the info as JSON, for callers that only
+        pass it along
+        """
+        blob = self._cache.get_serialized(url)
+
+        if blob is not None:
+            logger.debug(f"Using cached info for {url}")
+            return blob
+
+        return self._single_flight.do(url, lambda: self._extract_and_cache(url))
+
+    def cached(self, url: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(url)
+
+    def invalidate(self, url: str) -> None:
+        self._cache.invalidate(url)
+
+    def extract_lazily(
+        self, url: str, **params: Any
+    ) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Extracts a playlist without resolving its entries. Returns the
+        playlist's info, minus its entries, and an iterator that fetches the
+        unresolved entries as it is advanced. Nothing here is cached.
+
+        The entries are fetched through the YoutubeDL that extracted the
+        playlist, which stays checked out of its factory until the iterator
+        is exhausted or closed.
+        """
+        with ExitStack() as stack:
+            ytdl = stack.enter_context(self._ytdl_factory(**params))
+            info = ytdl.extract_info(url, download=False, process=False)
+
+            # playlist urls commonly resolve to another extractor's result
+            while info and info.get("_type") in ("url", "url_transparent"):
+                info = ytdl.extract_info(
+                    info["url"],
+                    ie_key=info.get("ie_key"),
+                    download=False,
+                    process=False,
+                )
+
+            info = info or {}
+            entries = info.pop("entries", None)
+            # handed over to the iterator, which exits it once it's done
+            return info, _PlaylistEntries(entries, stack.pop_all())
+
+    def _extract_and_cache(self, url: str) -> str:
+        # whoever held the lock before us may have left the result behind
+        blob = self._cache.get_serialized(url)
+        if blob is not None:
+            return blob
+
+        info = self._extract(url)
+        blob = json.dumps(info)
+
+        if info is not None:
+            self._cache.set_serialized(url, blob)
+
+        return blob
+
+    def _extract(self, url: str, **params: Any) -> Dict[str, Any]:
+        logger.debug(f"Extracting info for {url}")
+        with self._ytdl_factory(**params) as ytdl:
+            return ytdl.extract_info(url, download=False)
+
+
+class _PlaylistEntries:
+    """
+    Iterates a playlist's unresolved entries, holding on to whatever fetches
+    them until it's exhausted or closed. Closing works whether or not
+    iteration started, unlike a generator's.
+    """
+
+    def __init__(self, entries, holding: ExitStack):
+        self._entries = _iter_entries(entries)
+        self._holding = holding
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        try:
+            return next(self._entries)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._entries.close()
+        self._holding.close()
+
+
+def _iter_entries(entries, page_size=50) -> Iterator[Dict[str, Any]]:
+    if entries is None:
+        return
+
+    if isinstance(entries, PagedList):
+        for start in count(0, page_size):
+            page = entries.getslice(start, start + page_size)
+            yield from (entry for entry in page if entry)
+            if len(page) < page_size:
+                return
+
+    yield from (entry for entry in entries if entry)
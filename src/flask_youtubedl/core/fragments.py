@@ -0,0 +1,374 @@
+import logging
+import os
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import FunctionType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from youtube_dl import YoutubeDL
+from youtube_dl.compat import compat_urlparse
+from youtube_dl.downloader import get_suitable_downloader
+from youtube_dl.downloader.dash import DashSegmentsFD
+from youtube_dl.downloader.fragment import HttpQuietDownloader
+from youtube_dl.downloader.hls import HlsFD
+from youtube_dl.utils import encodeFilename, sanitize_open, update_url_query, urljoin
+
+logger = logging.getLogger(__name__)
+
+__all__ = (
+    "CONCURRENCY_PARAM",
+    "ConcurrentDashSegmentsFD",
+    "ConcurrentFragmentsMixin",
+    "ConcurrentHlsFD",
+    "UseConcurrentFragmentsMixin",
+)
+
+# youtube-dl param holding how many fragments are fetched at once
+CONCURRENCY_PARAM = "concurrent_fragment_downloads"
+
+# a fragment's url and byte range, which is how youtube-dl asks for it
+FRAGMENT_KEY = Tuple[str, Optional[str]]
+
+
+class ConcurrentFragmentsMixin:
+    """
+    Fetches the fragments of a DASH or HLS download with a pool of threads
+    ahead of youtube-dl's own fragment loop, which still appends them in
+    order, decrypts them, records where to resume from and reports progress.
+
+    Fragments are fetched to their own files at most twice the concurrency
+    ahead of the fragment being appended. Any fragment that couldn't be
+    fetched ahead of time, or that wasn't expected, is downloaded by
+    youtube-dl the usual way, retries included.
+    """
+
+    _prefetcher = None
+
+    def real_download(self, filename, info_dict):
+        concurrency = self.params.get(CONCURRENCY_PARAM) or 1
+        requests = self._fragment_requests(info_dict) if concurrency > 1 else []
+
+        if not requests:
+            return super().real_download(filename, info_dict)
+
+        prefix = f"{self.temp_name(filename)}-Prefetch"
+        # copied, HlsFD sets byte ranges on the info's own headers
+        headers = dict(info_dict.get("http_headers") or {})
+
+        def fetch(position: int) -> Optional[str]:
+            url, byte_range = requests[position]
+            fetch_headers = dict(headers, Range=byte_range) if byte_range else headers
+            return self._fetch_fragment(f"{prefix}{position}", url, fetch_headers)
+
+        with _Prefetcher(fetch, requests, concurrency) as self._prefetcher:
+            try:
+                return super().real_download(filename, info_dict)
+            finally:
+                self._prefetcher = None
+
+    def _fragment_requests(self, info_dict) -> List[FRAGMENT_KEY]:
+        raise NotImplementedError()
+
+    def _fetch_fragment(self, filename: str, url: str, headers: Dict) -> Optional[str]:
+        # a fragment left behind by an earlier run would be taken as complete
+        if os.path.isfile(encodeFilename(filename)):
+            os.remove(encodeFilename(filename))
+
+        dl = HttpQuietDownloader(
+            self.ydl,
+            {
+                "continuedl": False,
+                "quiet": True,
+                "noprogress": True,
+                "ratelimit": self._prefetch_ratelimit(),
+                "retries": self.params.get("retries", 0),
+                "nopart": self.params.get("nopart", False),
+                "test": self.params.get("test", False),
+            },
+        )
+
+        if not dl.download(filename, {"url": url, "http_headers": headers}):
+            return None
+
+        return filename
+
+    def _prefetch_ratelimit(self) -> Optional[float]:
+        # the limit is for the whole download, every thread gets its share
+        ratelimit = self.params.get("ratelimit")
+        if not ratelimit:
+            return ratelimit
+
+        return ratelimit / (self.params.get(CONCURRENCY_PARAM) or 1)
+
+    def _download_fragment(self, ctx, frag_url, info_dict, headers=None):
+        fetched = None
+
+        if self._prefetcher is not None:
+            fetched = self._prefetcher.take((frag_url, _byte_range(headers)))
+
+        if fetched is None:
+            return super()._download_fragment(ctx, frag_url, info_dict, headers)
+
+        stream, fragment_filename = sanitize_open(fetched, "rb")
+        with stream:
+            content = stream.read()
+
+        # _append_fragment removes it once it's written to the output
+        ctx["fragment_filename_sanitized"] = fragment_filename
+        self._report_fragment(ctx, len(content))
+        return True, content
+
+    def _report_fragment(self, ctx, size: int) -> None:
+        """
+        Reports a prefetched fragment to the hook youtube-dl put on the
+        fragment downloader, the same way a download of it would have
+        """
+        elapsed = time.time() - self._prefetcher.started
+        fetched = self._prefetcher.fetched_bytes(size)
+        event = {
+            "downloaded_bytes": size,
+            "total_bytes": size,
+            "filename": ctx["filename"],
+            "speed": fetched / elapsed if elapsed > 0 else None,
+        }
+
+        ctx["dl"]._hook_progress(dict(event, status="downloading"))
+        ctx["dl"]._hook_progress(dict(event, status="finished"))
+
+
+class ConcurrentDashSegmentsFD(ConcurrentFragmentsMixin, DashSegmentsFD):
+    def _fragment_requests(self, info_dict) -> List[FRAGMENT_KEY]:
+        fragments = info_dict["fragments"]
+        if self.params.get("test", False):
+            fragments = fragments[:1]
+
+        base_url = info_dict.get("fragment_base_url")
+        return [
+            (fragment.get("url") or urljoin(base_url, fragment["path"]), None)
+            for fragment in fragments
+        ]
+
+
+class ConcurrentHlsFD(ConcurrentFragmentsMixin, HlsFD):
+    def _fragment_requests(self, info_dict) -> List[FRAGMENT_KEY]:
+        """
+        Reads the fragments off the manifest the way HlsFD.real_download
+        does, which then fetches the manifest again for itself
+        """
+        if self.params.get("test", False):
+            return []
+
+        try:
+            urlh = self.ydl.urlopen(self._prepare_url(info_dict, info_dict["url"]))
+            manifest_url = urlh.geturl()
+            manifest = urlh.read().decode("utf-8", "ignore")
+        except Exception:
+            logger.debug("Could not read manifest, fragments won't be prefetched")
+            return []
+
+        # left to youtube-dl, which hands these to ffmpeg
+        if not self.can_download(manifest, info_dict):
+            return []
+
+        return list(_hls_fragments(manifest, manifest_url, info_dict))
+
+
+def _hls_fragments(manifest: str, manifest_url: str, info_dict):
+    extra_query = None
+    if extra_param := info_dict.get("extra_param_to_segment_url"):
+        extra_query = compat_urlparse.parse_qs(extra_param)
+
+    byte_range = {}
+    ad_fragment_next = False
+
+    for line in manifest.splitlines():
+        line = line.strip()
+
+        if not line:
+            continue
+
+        if not line.startswith("#"):
+            if ad_fragment_next:
+                continue
+
+            url = (
+                line
+                if re.match(r"^https?://", line)
+                else compat_urlparse.urljoin(manifest_url, line)
+            )
+            if extra_query:
+                url = update_url_query(url, extra_query)
+
+            yield url, (
+                f"bytes={byte_range['start']}-{byte_range['end'] - 1}"
+                if byte_range
+                else None
+            )
+
+        elif line.startswith("#EXT-X-BYTERANGE"):
+            length, _, start = line[17:].partition("@")
+            start = int(start) if start else byte_range["end"]
+            byte_range = {"start": start, "end": start + int(length)}
+
+        elif _is_ad_fragment_start(line):
+            ad_fragment_next = True
+
+        elif _is_ad_fragment_end(line):
+            ad_fragment_next = False
+
+
+def _is_ad_fragment_start(line: str) -> bool:
+    return (
+        line.startswith("#ANVATO-SEGMENT-INFO")
+        and "type=ad" in line
+        or line.startswith("#UPLYNK-SEGMENT")
+        and line.endswith(",ad")
+    )
+
+
+def _is_ad_fragment_end(line: str) -> bool:
+    return (
+        line.startswith("#ANVATO-SEGMENT-INFO")
+        and "type=master" in line
+        or line.startswith("#UPLYNK-SEGMENT")
+        and line.endswith(",segment")
+    )
+
+
+def _byte_range(headers: Optional[Dict[str, Any]]) -> Optional[str]:
+    return (headers or {}).get("Range")
+
+
+class _Prefetcher:
+    """
+    Runs fetch for the positions following whichever fragment was last
+    taken, at most twice the concurrency ahead of it. Fragments youtube-dl
+    skips over, e.g. when resuming, are dropped.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], Optional[str]],
+        requests: List[FRAGMENT_KEY],
+        concurrency: int,
+    ):
+        self._fetch = fetch
+        self._count = len(requests)
+        self._positions: Dict[FRAGMENT_KEY, List[int]] = {}
+        for position, key in enumerate(requests):
+            self._positions.setdefault(key, []).append(position)
+
+        self._pool = ThreadPoolExecutor(concurrency, thread_name_prefix="fragments")
+        self._ahead = concurrency * 2
+        self._futures: Dict[int, Future] = {}
+        self._submitted = 0
+        self._taken = 0
+        self._fetched_bytes = 0
+        self.started = time.time()
+
+    def __enter__(self) -> "_Prefetcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        for future in self._futures.values():
+            future.cancel()
+
+        self._pool.shutdown(wait=True)
+
+        for future in self._futures.values():
+            if not future.cancelled():
+                _discard(future)
+
+        self._futures.clear()
+
+    def take(self, key: FRAGMENT_KEY) -> Optional[str]:
+        """
+        The file the fragment was fetched to, None if it wasn't fetched
+        """
+        positions = self._positions.get(key, [])
+        position = next((p for p in positions if p >= self._taken), None)
+
+        if position is None:
+            return None
+
+        for skipped in [p for p in self._futures if p < position]:
+            self._futures[skipped].cancel()
+            _discard(self._futures.pop(skipped))
+
+        self._taken = position + 1
+        self._submit(position)
+        future = self._futures.pop(position)
+        self._submit(self._taken)
+
+        try:
+            return future.result()
+        except Exception:
+            logger.debug(f"Could not prefetch fragment {position}", exc_info=True)
+            return None
+
+    def fetched_bytes(self, size: int) -> int:
+        self._fetched_bytes += size
+        return self._fetched_bytes
+
+    def _submit(self, start: int) -> None:
+        self._submitted = max(self._submitted, start)
+        end = min(self._count, start + self._ahead)
+
+        while self._submitted < end:
+            position = self._submitted
+            self._futures[position] = self._pool.submit(self._fetch, position)
+            self._submitted += 1
+
+
+def _discard(future: Future) -> None:
+    # fetched but never appended
+    if future.cancelled() or future.exception() is not None:
+        return
+
+    if (filename := future.result()) and os.path.isfile(encodeFilename(filename)):
+        os.remove(encodeFilename(filename))
+
+
+_CONCURRENT_DOWNLOADERS = {
+    DashSegmentsFD: ConcurrentDashSegmentsFD,
+    HlsFD: ConcurrentHlsFD,
+}
+
+
+def _get_suitable_downloader(info_dict, params={}):
+    downloader = get_suitable_downloader(info_dict, params)
+
+    if (params.get(CONCURRENCY_PARAM) or 1) > 1:
+        return _CONCURRENT_DOWNLOADERS.get(downloader, downloader)
+
+    return downloader
+
+
+def _with_downloader_lookup(process_info):
+    # youtube-dl's own process_info, resolving its globals in a copy of its
+    # module's where get_suitable_downloader is ours
+    module_globals = dict(process_info.__globals__)
+    module_globals["get_suitable_downloader"] = _get_suitable_downloader
+
+    return FunctionType(
+        process_info.__code__,
+        module_globals,
+        process_info.__name__,
+        process_info.__defaults__,
+        process_info.__closure__,
+    )
+
+
+class UseConcurrentFragmentsMixin:
+    """
+    Downloads DASH and HLS formats with the concurrent downloaders when
+    CONCURRENCY_PARAM is above 1. YoutubeDL picks a downloader for every
+    format it downloads through the module level get_suitable_downloader,
+    which only this class's process_info resolves to one that swaps in the
+    concurrent downloaders. youtube-dl itself and any other YoutubeDL are
+    left alone, as are youtube-dl's other choices, e.g. live streams and
+    external downloaders.
+    """
+
+    process_info = _with_downloader_lookup(YoutubeDL.process_info)
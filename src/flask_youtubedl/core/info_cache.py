@@ -0,0 +1,292 @@
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+__all__ = (
+    "InfoCache",
+    "InfoCacheStats",
+    "LruInfoCache",
+    "NullInfoCache",
+    "RedisInfoCache",
+    "RedisInvalidations",
+    "TieredInfoCache",
+)
+
+INFO_TYPE = Dict[str, Any]
+
+
+class InfoCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class InfoCache(ABC):
+    """
+    Caches extracted info blobs by key. Blobs are stored serialized and every
+    get hands back a fresh copy since youtube-dl mutates the info it processes.
+    """
+
+    def __init__(self):
+        self.stats = InfoCacheStats()
+
+    def get(self, key: str) -> Optional[INFO_TYPE]:
+        blob = self.get_serialized(key)
+        return json.loads(blob) if blob is not None else None
+
+    def set(self, key: str, info: INFO_TYPE) -> None:
+        self.set_serialized(key, json.dumps(info))
+
+    @abstractmethod
+    def get_serialized(self, key: str) -> Optional[str]:
+        NotImplemented
+
+    @abstractmethod
+    def set_serialized(self, key: str, blob: str) -> None:
+        NotImplemented
+
+    @abstractmethod
+    def invalidate(self, key: str) -> None:
+        NotImplemented
+
+    def report(self) -> Dict[str, Any]:
+        """
+        What this process's cache has seen so far
+        """
+        return {"type": type(self).__name__, "stats": self.stats.as_dict()}
+
+
+class NullInfoCache(InfoCache):
+    def get_serialized(self, key: str) -> Optional[str]:
+        self.stats.misses += 1
+        return None
+
+    def set_serialized(self, key: str, blob: str) -> None:
+        pass
+
+    def invalidate(self, key: str) -> None:
+        pass
+
+
+class LruInfoCache(InfoCache):
+    def __init__(self, max_size: int, ttl: int):
+        super().__init__()
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_serialized(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            (expires_at, blob) = entry
+
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return blob
+
+    def set_serialized(self, key: str, blob: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, blob)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    def report(self) -> Dict[str, Any]:
+        report = super().report()
+        report.update(size=len(self), max_size=self._max_size, ttl=self._ttl)
+        return report
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisInfoCache(InfoCache):
+    """
+    Shares entries between every process pointed at the same redis, expiry is
+    left to redis
+    """
+
+    def __init__(self, redis_conn: Redis, ttl: int, prefix: str):
+        super().__init__()
+        self._conn = redis_conn
+        self._ttl = ttl
+        self._prefix = prefix
+
+    def get_serialized(self, key: str) -> Optional[str]:
+        blob = self._conn.get(self._key(key))
+
+        if blob is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return blob.decode("utf-8") if isinstance(blob, bytes) else blob
+
+    def set_serialized(self, key: str, blob: str) -> None:
+        self._conn.set(self._key(key), blob, ex=self._ttl)
+
+    def invalidate(self, key: str) -> None:
+        if self._conn.delete(self._key(key)):
+            self.stats.invalidations += 1
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+
+class RedisInvalidations:
+    """
+    Tells every process pointed at the same redis which keys were
+    invalidated, through a pub/sub channel. Each process listens from a
+    daemon thread, started the first time it's asked to listen. Processes
+    forked after that start their own.
+    """
+
+    def __init__(self, redis_conn: Redis, channel: str, reconnect_delay: float = 5):
+        self._conn = redis_conn
+        self._channel = channel
+        self._reconnect_delay = reconnect_delay
+        self._listening_in = None
+        self._lock = threading.Lock()
+
+    def publish(self, key: str) -> None:
+        self._conn.publish(self._channel, key)
+
+    def listen(self, on_invalidate: Callable[[str], None]) -> None:
+        pid = os.getpid()
+        if self._listening_in == pid:
+            return
+
+        with self._lock:
+            if self._listening_in == pid:
+                return
+
+            thread = threading.Thread(
+                target=self._listen,
+                args=(on_invalidate,),
+                name="info-cache-invalidations",
+                daemon=True,
+            )
+            thread.start()
+            self._listening_in = pid
+
+    def _listen(self, on_invalidate: Callable[[str], None]) -> None:
+        while True:
+            try:
+                pubsub = self._conn.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+                for message in pubsub.listen():
+                    key = message["data"]
+                    if isinstance(key, bytes):
+                        key = key.decode("utf-8")
+                    on_invalidate(key)
+            except Exception:
+                # invalidations missed meanwhile expire with their entries
+                logger.exception("Lost the info cache invalidation channel")
+                time.sleep(self._reconnect_delay)
+
+
+class TieredInfoCache(InfoCache):
+    """
+    Checks the in process cache before falling back to the shared one, which
+    is treated as best effort. Anything found there is kept locally.
+
+    Invalidations are passed on to every other process's in process cache
+    through invalidations, if provided, otherwise they keep what they have
+    until it expires.
+    """
+
+    def __init__(
+        self,
+        local: InfoCache,
+        shared: InfoCache,
+        invalidations: Optional[RedisInvalidations] = None,
+    ):
+        super().__init__()
+        self.local = local
+        self.shared = shared
+        self._invalidations = invalidations
+
+    def get_serialized(self, key: str) -> Optional[str]:
+        self._listen()
+        blob = self.local.get_serialized(key)
+
+        if blob is None:
+            try:
+                blob = self.shared.get_serialized(key)
+            except Exception:
+                logger.exception(f"Could not read {key} from shared info cache")
+
+            if blob is not None:
+                self.local.set_serialized(key, blob)
+
+        if blob is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+
+        return blob
+
+    def set_serialized(self, key: str, blob: str) -> None:
+        self._listen()
+        self.local.set_serialized(key, blob)
+
+        try:
+            self.shared.set_serialized(key, blob)
+        except Exception:
+            logger.exception(f"Could not write {key} to shared info cache")
+
+    def invalidate(self, key: str) -> None:
+        self.local.invalidate(key)
+        self.shared.invalidate(key)
+        self.stats.invalidations += 1
+
+        if self._invalidations is not None:
+            self._invalidations.publish(key)
+
+    def report(self) -> Dict[str, Any]:
+        report = super().report()
+        report.update(local=self.local.report(), shared=self.shared.report())
+        return report
+
+    def _listen(self) -> None:
+        if self._invalidations is None:
+            return
+
+        try:
+            self._invalidations.listen(self.local.invalidate)
+        except Exception:
+            logger.exception("Could not listen for info cache invalidations")
@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+from typing import Any, Optional
+
+from sqlalchemy.orm import Query
+
+from ..exceptions import FlaskYoutubeDLException
+from ..models import Pagination, PaginationData
+
+__all__ = ("InvalidCursor", "decode_cursor", "encode_cursor", "paginate")
+
+
+class InvalidCursor(FlaskYoutubeDLException):
+    pass
+
+
+def encode_cursor(value: Any) -> str:
+    blob = json.dumps(value).encode("utf-8")
+    return base64.urlsafe_b64encode(blob).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Any:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def paginate(query: Query, key, page_size: int, cursor: Optional[str]) -> Pagination:
+    """
+    Pages through the query newest first by seeking past the key of the last
+    item handed out rather than with OFFSET, so every page costs the same
+    however deep it is. The key must be unique and increasing, like a
+    primary key. Fetches one extra row to tell if there's another page
+    instead of counting.
+    """
+    if cursor is not None:
+        last_seen = decode_cursor(cursor)
+        if not isinstance(last_seen, int):
+            raise InvalidCursor(cursor)
+        query = query.filter(key < last_seen)
+
+    items = query.order_by(key.desc()).limit(page_size + 1).all()
+    has_next_page = len(items) > page_size
+    items = items[:page_size]
+    next_cursor = encode_cursor(getattr(items[-1], key.key)) if has_next_page else None
+
+    return Pagination(items, PaginationData(page_size, has_next_page, next_cursor))
@@ -0,0 +1,274 @@
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional
+
+from injector import inject
+from redis import Redis
+from sqlalchemy.orm import Session
+
+from ..config import DownloadTaskConfig
+from ..models import DownloadAttempt
+
+logger = logging.getLogger(__name__)
+
+__all__ = (
+    "LiveProgress",
+    "NullLiveProgress",
+    "NullProgressEvents",
+    "PROGRESS_FIELDS",
+    "ProgressEvents",
+    "ProgressSink",
+    "RedisLiveProgress",
+    "RedisProgressEvents",
+)
+
+PROGRESS_FIELDS = (
+    "status",
+    "downloaded_bytes",
+    "total_bytes",
+    "eta",
+    "elapsed",
+    "speed",
+    "filename",
+    "tmpfilename",
+)
+
+
+class LiveProgress(ABC):
+    """
+    Holds the progress of in flight download attempts between the database
+    checkpoints made by ProgressSink
+    """
+
+    @abstractmethod
+    def publish(self, attempt_id: int, progress: Dict[str, Any]) -> None:
+        NotImplemented
+
+    @abstractmethod
+    def get(self, attempt_id: int) -> Optional[Dict[str, Any]]:
+        NotImplemented
+
+    @abstractmethod
+    def clear(self, attempt_id: int) -> None:
+        NotImplemented
+
+
+class NullLiveProgress(LiveProgress):
+    def publish(self, attempt_id: int, progress: Dict[str, Any]) -> None:
+        pass
+
+    def get(self, attempt_id: int) -> Optional[Dict[str, Any]]:
+        return None
+
+    def clear(self, attempt_id: int) -> None:
+        pass
+
+
+class RedisLiveProgress(LiveProgress):
+    """
+    Keeps the latest progress of each attempt under its own key. Keys expire
+    after ttl seconds without an update so a worker that dies mid download
+    doesn't leave its last update behind forever.
+    """
+
+    def __init__(self, redis_conn: Redis, prefix: str, ttl: int):
+        self._conn = redis_conn
+        self._prefix = prefix
+        self._ttl = ttl
+
+    def publish(self, attempt_id: int, progress: Dict[str, Any]) -> None:
+        self._conn.set(self._key(attempt_id), json.dumps(progress), ex=self._ttl)
+
+    def get(self, attempt_id: int) -> Optional[Dict[str, Any]]:
+        blob = self._conn.get(self._key(attempt_id))
+        return json.loads(blob) if blob is not None else None
+
+    def clear(self, attempt_id: int) -> None:
+        self._conn.delete(self._key(attempt_id))
+
+    def _key(self, attempt_id: int) -> str:
+        return f"{self._prefix}{attempt_id}"
+
+
+class ProgressEvents(ABC):
+    """
+    Fans progress events out to whoever is listening for a video's downloads
+    """
+
+    @abstractmethod
+    def publish(self, video_id: str, event: Dict[str, Any]) -> None:
+        NotImplemented
+
+    @abstractmethod
+    def listen(self, video_id: str, timeout: float) -> Iterator[Optional[Dict]]:
+        """
+        Yields events for the video as they're published and None whenever
+        timeout seconds pass without one, so callers get a chance to send
+        keepalives or give up. Stops listening once the iterator is closed.
+        """
+        NotImplemented
+
+
+class NullProgressEvents(ProgressEvents):
+    def publish(self, video_id: str, event: Dict[str, Any]) -> None:
+        pass
+
+    def listen(self, video_id: str, timeout: float) -> Iterator[Optional[Dict]]:
+        while True:
+            time.sleep(timeout)
+            yield None
+
+
+class RedisProgressEvents(ProgressEvents):
+    """
+    Publishes events on a pub/sub channel per video. Nothing is kept for
+    listeners that subscribe late, they're expected to start from the latest
+    attempt's checkpoint and live progress.
+    """
+
+    def __init__(self, redis_conn: Redis, prefix: str):
+        self._conn = redis_conn
+        self._prefix = prefix
+
+    def publish(self, video_id: str, event: Dict[str, Any]) -> None:
+        self._conn.publish(self._channel(video_id), json.dumps(event))
+
+    def listen(self, video_id: str, timeout: float) -> Iterator[Optional[Dict]]:
+        # subscribed up front rather than once iteration starts, so callers
+        # can read a checkpoint after listening without missing anything
+        pubsub = self._conn.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel(video_id))
+        return _Subscription(pubsub, timeout)
+
+    def _channel(self, video_id: str) -> str:
+        return f"{self._prefix}{video_id}"
+
+
+class _Subscription:
+    """
+    Events from a pub/sub subscription. Closing it unsubscribes whether or
+    not iteration started, unlike closing a generator.
+    """
+
+    def __init__(self, pubsub, timeout: float):
+        self._pubsub = pubsub
+        self._timeout = timeout
+
+    def __iter__(self) -> Iterator[Optional[Dict]]:
+        return self
+
+    def __next__(self) -> Optional[Dict]:
+        if self._pubsub is None:
+            raise StopIteration
+
+        try:
+            message = self._pubsub.get_message(timeout=self._timeout)
+        except BaseException:
+            self.close()
+            raise
+
+        return json.loads(message["data"]) if message else None
+
+    def close(self) -> None:
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+class ProgressSink:
+    """
+    Coalesces youtube-dl's progress events for a download attempt. Every
+    event is applied to the attempt in memory, but the attempt is only
+    committed once flush_interval seconds have passed or flush_bytes more
+    bytes have been downloaded since the last commit. Between commits the
+    latest progress is published to the live progress store and to anyone
+    listening for the video's progress events, which is throttled to once
+    every live_interval seconds.
+
+    Terminal states aren't buffered, checkpoint writes them immediately.
+    Closing the sink lets listeners know the download task is over.
+    """
+
+    @inject
+    def __init__(
+        self,
+        attempt: DownloadAttempt,
+        session: Session,
+        live_progress: LiveProgress,
+        events: ProgressEvents,
+        task_config: DownloadTaskConfig,
+    ):
+        self._attempt = attempt
+        self._session = session
+        self._live_progress = live_progress
+        self._events = events
+        self._video_id = attempt.video.video_id
+        self._flush_interval = task_config.progress_flush_interval
+        self._flush_bytes = task_config.progress_flush_bytes
+        self._live_interval = task_config.progress_live_interval
+        self._flushed_at = self._published_at = time.monotonic()
+        self._flushed_bytes = attempt.downloaded_bytes or 0
+
+    def update(self, event: Dict[str, Any]) -> None:
+        self._attempt.set_downloading(event)
+        now = time.monotonic()
+
+        downloaded = self._attempt.downloaded_bytes or 0
+        if (
+            now - self._flushed_at >= self._flush_interval
+            or downloaded - self._flushed_bytes >= self._flush_bytes
+        ):
+            self.checkpoint()
+        elif now - self._published_at >= self._live_interval:
+            self._publish(now)
+
+    def checkpoint(self) -> None:
+        """
+        Commits the attempt along with every event buffered since the last
+        checkpoint
+        """
+        self._session.commit()
+        self._flushed_at = time.monotonic()
+        self._flushed_bytes = self._attempt.downloaded_bytes or 0
+
+        if self._attempt.is_downloading():
+            self._publish(self._flushed_at)
+        else:
+            self._clear()
+            self._send("progress", self._progress())
+
+    def close(self) -> None:
+        self._session.commit()
+        self._clear()
+        self._send("done", self._progress())
+
+    def _progress(self) -> Dict[str, Any]:
+        progress = {field: getattr(self._attempt, field) for field in PROGRESS_FIELDS}
+        progress["attempt_id"] = self._attempt.id
+        return progress
+
+    def _publish(self, now: float) -> None:
+        self._published_at = now
+        progress = self._progress()
+
+        try:
+            self._live_progress.publish(self._attempt.id, progress)
+        except Exception:
+            # live progress is a nicety, the checkpoints are what count
+            logger.exception(f"Could not publish progress for {self._attempt.id}")
+
+        self._send("progress", progress)
+
+    def _send(self, event_type: str, progress: Dict[str, Any]) -> None:
+        try:
+            self._events.publish(self._video_id, {"event": event_type, **progress})
+        except Exception:
+            logger.exception(f"Could not send progress for {self._attempt.id}")
+
+    def _clear(self) -> None:
+        try:
+            self._live_progress.clear(self._attempt.id)
+        except Exception:
+            logger.exception(f"Could not clear progress for {self._attempt.id}")
@@ -0,0 +1,198 @@
+import logging
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+__all__ = (
+    "DownloadLimiter",
+    "ExtractorLimits",
+    "NullDownloadLimiter",
+    "RedisDownloadLimiter",
+)
+
+
+class ExtractorLimits:
+    """
+    per_minute and burst make a token bucket for downloads started,
+    concurrency caps downloads running at once. 0 turns either off.
+    """
+
+    def __init__(self, per_minute: float = 0, burst: int = 1, concurrency: int = 0):
+        self.per_minute = float(per_minute)
+        self.burst = max(int(burst), 1)
+        self.concurrency = int(concurrency)
+
+    @classmethod
+    def with_overrides(
+        cls, defaults: "ExtractorLimits", overrides: Dict[str, Any]
+    ) -> "ExtractorLimits":
+        return cls(
+            per_minute=overrides.get("per_minute", defaults.per_minute),
+            burst=overrides.get("burst", defaults.burst),
+            concurrency=overrides.get("concurrency", defaults.concurrency),
+        )
+
+    def unlimited(self) -> bool:
+        return self.per_minute <= 0 and self.concurrency <= 0
+
+
+class DownloadLimiter(ABC):
+    """
+    Decides whether a download from an extractor may start now
+    """
+
+    @abstractmethod
+    def acquire(self, extractor: Optional[str], lease: str) -> float:
+        """
+        0 when the download may start, in which case it holds its lease until
+        released. Otherwise how many seconds to wait before asking again.
+        Asking again with a lease that's already held is granted.
+        """
+        NotImplemented
+
+    @abstractmethod
+    def release(self, extractor: Optional[str], lease: str) -> None:
+        NotImplemented
+
+
+class NullDownloadLimiter(DownloadLimiter):
+    def acquire(self, extractor: Optional[str], lease: str) -> float:
+        return 0
+
+    def release(self, extractor: Optional[str], lease: str) -> None:
+        pass
+
+
+# KEYS: token bucket hash, leases sorted set
+# ARGV: tokens per second, burst, concurrency, lease, lease ttl
+# returns, as a string since lua numbers are truncated to integers on the way
+# out, 0 when granted, -1 when at the concurrency limit and otherwise the
+# seconds until a token is available
+_ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local concurrency = tonumber(ARGV[3])
+local lease = ARGV[4]
+local ttl = tonumber(ARGV[5])
+
+if concurrency > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+    if not redis.call('ZSCORE', KEYS[2], lease)
+        and redis.call('ZCARD', KEYS[2]) >= concurrency then
+        return '-1'
+    end
+end
+
+if rate > 0 then
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+    local tokens = tonumber(bucket[1]) or burst
+    local at = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - at) * rate)
+
+    if tokens < 1 then
+        return tostring((1 - tokens) / rate)
+    end
+
+    redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens - 1), 'at', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+end
+
+if concurrency > 0 then
+    redis.call('ZADD', KEYS[2], now + ttl, lease)
+    redis.call('EXPIRE', KEYS[2], ttl)
+end
+
+return '0'
+"""
+
+
+class RedisDownloadLimiter(DownloadLimiter):
+    """
+    Limits downloads per extractor across every worker sharing the redis.
+    Each extractor gets a token bucket, refilled continuously, and a sorted
+    set of the leases held by running downloads. Leases expire after
+    lease_ttl seconds so a worker that dies mid download doesn't hold its
+    slot forever.
+
+    Downloads turned away for concurrency wait busy_countdown seconds, every
+    wait is stretched by up to a tenth so deferred downloads don't all come
+    back at once. If redis can't be reached downloads aren't limited.
+    """
+
+    def __init__(
+        self,
+        redis_conn: Redis,
+        prefix: str,
+        defaults: ExtractorLimits,
+        overrides: Dict[str, ExtractorLimits],
+        lease_ttl: int,
+        busy_countdown: float,
+    ):
+        self._conn = redis_conn
+        self._prefix = prefix
+        self._defaults = defaults
+        self._overrides = overrides
+        self._lease_ttl = lease_ttl
+        self._busy_countdown = busy_countdown
+        self._acquire = redis_conn.register_script(_ACQUIRE_SCRIPT)
+
+    def acquire(self, extractor: Optional[str], lease: str) -> float:
+        extractor = _normalize(extractor)
+        limits = self._limits(extractor)
+
+        if limits.unlimited():
+            return 0
+
+        try:
+            wait = float(
+                self._acquire(
+                    keys=[self._bucket_key(extractor), self._leases_key(extractor)],
+                    args=[
+                        limits.per_minute / 60,
+                        limits.burst,
+                        limits.concurrency,
+                        lease,
+                        self._lease_ttl,
+                    ],
+                )
+            )
+        except Exception:
+            logger.exception(f"Could not check limits for {extractor}, not limiting")
+            return 0
+
+        if wait < 0:
+            wait = self._busy_countdown
+
+        return wait * (1 + random.random() / 10) if wait > 0 else 0
+
+    def release(self, extractor: Optional[str], lease: str) -> None:
+        extractor = _normalize(extractor)
+
+        if self._limits(extractor).concurrency <= 0:
+            return
+
+        try:
+            self._conn.zrem(self._leases_key(extractor), lease)
+        except Exception:
+            logger.exception(f"Could not release {lease} for {extractor}")
+
+    def _limits(self, extractor: str) -> ExtractorLimits:
+        return self._overrides.get(extractor, self._defaults)
+
+    def _bucket_key(self, extractor: str) -> str:
+        return f"{self._prefix}{extractor}:bucket"
+
+    def _leases_key(self, extractor: str) -> str:
+        return f"{self._prefix}{extractor}:leases"
+
+
+def _normalize(extractor: Optional[str]) -> str:
+    # videos stored from unresolved playlist entries may not know theirs yet
+    return (extractor or "unknown").lower()
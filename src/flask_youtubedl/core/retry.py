@@ -0,0 +1,116 @@
+import random
+import re
+import socket
+import ssl
+from http.client import HTTPException
+from typing import Iterator, Optional
+
+from youtube_dl.compat import compat_urllib_error
+from youtube_dl.utils import (
+    ContentTooShortError,
+    ExtractorError,
+    GeoRestrictedError,
+    UnsupportedError,
+)
+
+__all__ = ("PERMANENT", "TRANSIENT", "backoff", "classify_error")
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# youtube-dl mostly reports why a video can't be had in its messages
+_PERMANENT_MESSAGES = re.compile(
+    r"unavailable|private video|video is private|has been removed|not available"
+    r"|no longer available|does not exist|copyright|account .*terminated"
+    r"|members[- ]only|confirm your age|unsupported url|premieres in",
+    re.IGNORECASE,
+)
+_TRANSIENT_MESSAGES = re.compile(
+    r"http error (?:403|408|429|5\d\d)|too many requests|timed out|time out"
+    r"|temporar|try again|connection (?:reset|refused|aborted)"
+    r"|name resolution|incomplete read|did not get any data",
+    re.IGNORECASE,
+)
+
+
+def classify_error(exception: BaseException) -> str:
+    """
+    Whether a failed download is worth retrying: network trouble, 5xx and
+    throttling are transient while videos that are unavailable, private or
+    unsupported are permanent. Anything unrecognized is treated as
+    transient, retries are bounded by DownloadTaskConfig.max_attempts.
+    """
+    for cause in _causes(exception):
+        classification = _classify_one(cause)
+        if classification is not None:
+            return classification
+
+    for cause in _causes(exception):
+        message = str(cause)
+        if _PERMANENT_MESSAGES.search(message):
+            return PERMANENT
+        if _TRANSIENT_MESSAGES.search(message):
+            return TRANSIENT
+
+    return TRANSIENT
+
+
+def backoff(retry: int, base: float, cap: float) -> float:
+    """
+    Seconds to wait before the retry'th retry, counting from 0: exponential
+    with full jitter so retries of downloads that failed together spread out
+    """
+    return random.uniform(0, min(cap, base * 2 ** retry))
+
+
+def _classify_one(exception: BaseException) -> Optional[str]:
+    if isinstance(exception, compat_urllib_error.HTTPError):
+        # youtube answers with 403 once stream urls expire or when throttling
+        if exception.code in (403, 408, 429) or exception.code >= 500:
+            return TRANSIENT
+        return PERMANENT
+
+    if isinstance(
+        exception,
+        (
+            compat_urllib_error.URLError,
+            socket.timeout,
+            ConnectionError,
+            TimeoutError,
+            HTTPException,
+            ssl.SSLError,
+            ContentTooShortError,
+        ),
+    ):
+        return TRANSIENT
+
+    if isinstance(exception, (GeoRestrictedError, UnsupportedError)):
+        return PERMANENT
+
+    return None
+
+
+def _causes(exception: BaseException) -> Iterator[BaseException]:
+    """
+    The exception and whatever it wraps, youtube-dl keeps causes on
+    DownloadError.exc_info and ExtractorError.cause
+    """
+    seen = set()
+    pending = [exception]
+
+    while pending:
+        current = pending.pop(0)
+        if current is None or id(current) in seen:
+            continue
+
+        seen.add(id(current))
+        yield current
+
+        exc_info = getattr(current, "exc_info", None)
+        if isinstance(exc_info, tuple) and len(exc_info) == 3:
+            pending.append(exc_info[1])
+
+        if isinstance(current, ExtractorError):
+            pending.append(current.cause)
+
+        pending.extend((current.__cause__, current.__context__))
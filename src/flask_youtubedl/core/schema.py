@@ -1,19 +1,96 @@
-from marshmallow import fields as ma_fields, post_load
+from marshmallow import Schema, fields as ma_fields, post_load, validate
 from marshmallow_annotations import AnnotationSchema
 
 from ..models import (
     Download,
     DownloadAttempt,
+    DownloadSubmission,
     Pagination,
     PaginationData,
     Playlist,
+    PlaylistDownloadProgress,
     Video,
 )
 from .ytdl_options import YtdlDownloadOptions
 
 
+class SummarySchema(Schema):
+    """
+    Flat representation of a model for list responses. Relationships named in
+    expandable are nested summaries that are only dumped when asked for, see
+    server.helpers.fields
+    """
+
+    expandable = ()
+
+    id = ma_fields.Integer()
+    created = ma_fields.DateTime()
+    last_modified = ma_fields.DateTime()
+
+    @classmethod
+    def plain_fields(cls):
+        return tuple(
+            name for name in cls._declared_fields if name not in cls.expandable
+        )
+
+
+class PlaylistSummarySchema(SummarySchema):
+    playlist_id = ma_fields.String()
+    playlist_name = ma_fields.String()
+    extractor = ma_fields.String()
+    webpage_url = ma_fields.String()
+
+
+class VideoSummarySchema(SummarySchema):
+    expandable = ("downloads", "playlists")
+
+    video_id = ma_fields.String()
+    name = ma_fields.String()
+    extractor = ma_fields.String()
+    duration = ma_fields.Integer()
+    webpage_url = ma_fields.String()
+    downloads = ma_fields.List(
+        ma_fields.Nested("DownloadSummarySchema", only=("id", "download_id"))
+    )
+    playlists = ma_fields.List(ma_fields.Nested(PlaylistSummarySchema))
+
+
+class DownloadAttemptSummarySchema(SummarySchema):
+    expandable = ("download", "video")
+
+    status = ma_fields.String()
+    message = ma_fields.String()
+    downloaded_bytes = ma_fields.Integer()
+    total_bytes = ma_fields.Integer()
+    filename = ma_fields.String()
+    download = ma_fields.Nested(
+        "DownloadSummarySchema", exclude=("video", "latest_attempt", "attempts")
+    )
+    video = ma_fields.Nested(VideoSummarySchema, exclude=VideoSummarySchema.expandable)
+
+
+class DownloadSummarySchema(SummarySchema):
+    expandable = ("video", "latest_attempt", "attempts")
+
+    download_id = ma_fields.String()
+    block_further = ma_fields.Boolean()
+    block_reason = ma_fields.String()
+    video = ma_fields.Nested(VideoSummarySchema, exclude=VideoSummarySchema.expandable)
+    latest_attempt = ma_fields.Nested(
+        DownloadAttemptSummarySchema, exclude=DownloadAttemptSummarySchema.expandable
+    )
+    attempts = ma_fields.List(
+        ma_fields.Nested(
+            DownloadAttemptSummarySchema,
+            exclude=DownloadAttemptSummarySchema.expandable,
+        )
+    )
+
+
 class PlaylistSchema(AnnotationSchema):
-    videos = ma_fields.List(ma_fields.Nested("VideoSchema", exclude=("playlists",)))
+    videos = ma_fields.List(
+        ma_fields.Nested("VideoSummarySchema", exclude=VideoSummarySchema.expandable)
+    )
 
     class Meta:
         target = Playlist
@@ -75,6 +152,52 @@ class YtdlDownloadOptionsSchema(AnnotationSchema):
     @post_load
     def into_instance(self, data, **kwargs):
         opts = YtdlDownloadOptions()
-        opts.download_archive = data["download_archive"]
-        opts.outtmpl = data["outtmpl"]
+        opts.download_archive = data.get("download_archive")
+        opts.outtmpl = data.get("outtmpl")
         return opts
+
+
+class DownloadSubmissionSchema(AnnotationSchema):
+    download = ma_fields.Nested(
+        DownloadSummarySchema, exclude=("video", "attempts"), allow_none=True
+    )
+
+    class Meta:
+        target = DownloadSubmission
+        register_as_scheme = True
+
+
+class BulkDownloadRequestSchema(Schema):
+    # bounded so a single request can't hold a web worker indefinitely
+    video_ids = ma_fields.List(
+        ma_fields.String(validate=validate.Length(min=1)),
+        required=True,
+        validate=validate.Length(min=1, max=1000),
+    )
+    options = ma_fields.Nested(YtdlDownloadOptionsSchema, missing=dict)
+
+
+class PlaylistDownloadProgressSchema(AnnotationSchema):
+    statuses = ma_fields.Dict()
+
+    class Meta:
+        target = PlaylistDownloadProgress
+        register_as_scheme = True
+
+
+class PlaylistDownloadRequestSchema(Schema):
+    options = ma_fields.Nested(YtdlDownloadOptionsSchema, missing=dict)
+    # falls back to DownloadTaskConfig.playlist_concurrency
+    concurrency = ma_fields.Integer(
+        missing=None, allow_none=True, validate=validate.Range(min=1)
+    )
+
+
+class ListingArgsSchema(Schema):
+    cursor = ma_fields.String(missing=None)
+    page_size = ma_fields.Integer(missing=50, validate=validate.Range(min=1, max=500))
+    # compared against the latest attempt's status for downloads
+    status = ma_fields.String(missing=None)
+    extractor = ma_fields.String(missing=None)
+    created_after = ma_fields.DateTime(missing=None)
+    created_before = ma_fields.DateTime(missing=None)
@@ -0,0 +1,105 @@
+import logging
+import threading
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+from redis import Redis
+from redis.exceptions import LockError
+
+logger = logging.getLogger(__name__)
+
+__all__ = ("SingleFlight", "RedisSingleFlight")
+
+R = TypeVar("R")
+
+
+class _Call(Generic[R]):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[R] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key within a process. The first
+    caller runs the function, everyone who shows up while it is running waits
+    for it and receives the same result, or the same exception.
+
+    Results are shared as is, hand out something immutable if callers might
+    modify it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], R]) -> R:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def _run(self, key: str, fn: Callable[[], R]) -> R:
+        return fn()
+
+
+class RedisSingleFlight(SingleFlight):
+    """
+    Additionally holds a redis lock per key while running so only one process
+    at a time runs the function. Waiting processes only benefit if the function
+    checks somewhere shared, e.g. a redis backed cache, for the result the
+    previous holder left behind before doing the work itself.
+
+    A process that waits longer than wait seconds runs the function anyway
+    rather than fail the call.
+    """
+
+    def __init__(self, redis_conn: Redis, prefix: str, timeout: int, wait: int):
+        super().__init__()
+        self._conn = redis_conn
+        self._prefix = prefix
+        self._timeout = timeout
+        self._wait = wait
+
+    def _run(self, key: str, fn: Callable[[], R]) -> R:
+        lock = self._conn.lock(
+            f"{self._prefix}{key}", timeout=self._timeout, blocking_timeout=self._wait
+        )
+
+        try:
+            acquired = lock.acquire()
+        except Exception:
+            logger.exception(f"Could not take lock for {key}, running unlocked")
+            acquired = False
+
+        if not acquired:
+            logger.warning(f"Gave up waiting on lock for {key}, running unlocked")
+            return fn()
+
+        try:
+            return fn()
+        finally:
+            try:
+                lock.release()
+            except LockError:
+                # expired while the function ran, someone else may hold it now
+                logger.warning(f"Lock for {key} expired before it was released")
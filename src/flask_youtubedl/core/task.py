@@ -1,13 +1,16 @@
 from abc import ABC, abstractmethod
+import copy
 import logging
+import os
 from contextlib import redirect_stderr, redirect_stdout
 from io import StringIO
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from injector import inject
 from youtube_dl import YoutubeDL
-from youtube_dl.utils import YoutubeDLError
+from youtube_dl.utils import DownloadError, YoutubeDLError
 
+from .artifacts import ArtifactKey, ArtifactStore, NullArtifactStore
 from .configuration import OptionsFactory
 from .ytdl_factory import YtdlFactory
 
@@ -25,6 +28,10 @@ class DownloadTaskOptionsFixer(OptionsFactory):
         video_options["noplaylist"] = False
         video_options["progress_with_new_line"] = True
         video_options.setdefault("download_archive", "default_archive")
+        # partial downloads are continued from their .part file with ranged
+        # requests, see worker.tasks._resume_partial
+        video_options["continuedl"] = True
+        video_options["nopart"] = False
 
 
 
@@ -36,14 +43,18 @@ class DownloadTask:
         run_options: Dict[str, Any],
         ytdl_factory: YtdlFactory,
         options_factories: List[OptionsFactory],
+        artifacts: ArtifactStore,
         on_error: List[Callable[["DownloadTask", Exception], None]] = None,
+        info: Optional[Dict[str, Any]] = None,
     ):
         self._url = url
+        self._info = info
         self._run_options = run_options
         self._on_error = on_error if on_error is not None else []
         self._options_factories = options_factories
         self._options_factories.append(DownloadTaskOptionsFixer())
         self._ytdl_factory = ytdl_factory
+        self._artifacts = artifacts
         self._ytdl = None
         self._options = None
 
@@ -72,13 +83,133 @@ class DownloadTask:
             outtmpl = self.options.get("outtmpl", "")
             logger.info(f"Download template: {outtmpl}")
             try:
-                ytdl.download([self._url])
+                if self._info is not None:
+                    self._download_with_info(ytdl)
+                else:
+                    ytdl.download([self._url])
             except Exception as e:
                 # ???
                 logger.exception("Unhandled exception while processing download")
                 for on_error in self._on_error:
                     on_error(self, e)
 
+    def _download_with_info(self, ytdl: YoutubeDL) -> None:
+        """
+        Downloads from info that was already extracted, skipping a second
+        extraction. Mirrors YoutubeDL.download_with_info_file: if the info
+        can't be used, e.g. its stream urls expired, start over from the url.
+        """
+        try:
+            key, filename = None, None
+            if not isinstance(self._artifacts, NullArtifactStore):
+                key, filename = self._resolve_artifact(ytdl)
+
+            if key is not None and self._place_artifact(ytdl, key, filename):
+                return
+
+            ytdl.process_ie_result(self._info, download=True)
+
+            if key is not None:
+                self._add_artifact(ytdl, key, filename)
+        except DownloadError:
+            logger.warning(
+                f"Could not download from extracted info, retrying with {self._url}"
+            )
+            ytdl.download([self._url])
+
+    def _resolve_artifact(
+        self, ytdl: YoutubeDL
+    ) -> Tuple[Optional[ArtifactKey], Optional[str]]:
+        """
+        Selects formats the way the download will, on a copy of the info, to
+        find out which artifact it produces and where. Downloads youtube-dl
+        would post process, skip or send somewhere else aren't shared.
+        """
+        if (
+            self._info.get("_type", "video") != "video"
+            or ytdl._pps
+            or self.options.get("outtmpl") == "-"
+        ):
+            return None, None
+
+        resolved = ytdl.process_ie_result(copy.deepcopy(self._info), download=False)
+        extractor = resolved.get("extractor_key") or resolved.get("extractor")
+
+        if (
+            not (extractor and resolved.get("id") and resolved.get("format_id"))
+            or ytdl.in_download_archive(resolved)
+        ):
+            return None, None
+
+        key = ArtifactKey(extractor, resolved["id"], resolved["format_id"])
+        return key, _output_filename(ytdl, resolved)
+
+    def _place_artifact(self, ytdl: YoutubeDL, key: ArtifactKey, filename: str) -> bool:
+        """
+        Puts an already downloaded copy of the artifact where the download
+        would have and reports it to the progress hooks as downloaded
+        """
+        try:
+            size = self._artifacts.place(key, filename)
+        except Exception:
+            logger.exception(f"Could not place stored {key!r}, downloading it")
+            return False
+
+        if size is None:
+            return False
+
+        logger.info(f"{key!r} already downloaded, placed at {filename}")
+        event = {
+            "filename": filename,
+            "downloaded_bytes": size,
+            "total_bytes": size,
+            "elapsed": 0,
+        }
+        for hook in ytdl._progress_hooks:
+            hook(dict(event, status="downloading"))
+            hook(dict(event, status="finished"))
+
+        ytdl.record_download_archive(self._info)
+        return True
+
+    def _add_artifact(self, ytdl: YoutubeDL, key: ArtifactKey, filename: str) -> None:
+        if not os.path.isfile(filename):
+            # failed or ended up elsewhere, nothing to share
+            return
+
+        try:
+            self._artifacts.add(key, filename)
+        except Exception:
+            logger.exception(f"Could not store {filename} as {key!r}")
+
+
+def _output_filename(ytdl: YoutubeDL, info: Dict[str, Any]) -> str:
+    """
+    Where YoutubeDL.process_info puts the download, including its switch to
+    mkv for formats that can't be merged otherwise
+    """
+    filename = ytdl.prepare_filename(info)
+    requested_formats = info.get("requested_formats")
+
+    if not requested_formats or ytdl.params.get("merge_output_format"):
+        return filename
+
+    root, ext = os.path.splitext(filename)
+    if ext[1:] != info["ext"]:
+        root = filename
+
+    exts = [f.get("ext") for f in requested_formats]
+    compatible = all(exts) and any(
+        all(ext in group for ext in exts) for group in _MERGEABLE_EXTS
+    )
+
+    return f"{root}.{info['ext'] if compatible else 'mkv'}"
+
+
+_MERGEABLE_EXTS = (
+    ("mp3", "mp4", "m4a", "m4p", "m4b", "m4r", "m4v", "ismv", "isma"),
+    ("webm",),
+)
 
 
 class DownloadTaskOnError(ABC):
@@ -1,15 +1,37 @@
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, TypeVar
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
 from ..models import Playlist, Video
+from ..models.video import video_to_playlist
+
+T = TypeVar("T")
+
+# keeps IN (...) lists and multi row inserts well under the bound parameter
+# limits of every backend we care about
+BATCH_SIZE = 500
+
+
+def batched(iterable: Iterable[T], size: int = BATCH_SIZE) -> Iterator[List[T]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def video_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def playlist_url(playlist_id: str) -> str:
+    return f"https://www.youtube.com/playlist?list={playlist_id}"
 
 
 def store_video(video_blob, add_to_playlist=None):
     video = Video.query.filter(Video.video_id == video_blob["id"]).first()
     if video is None:
-        video = Video()
-        video.name = video_blob["title"]
-        video.video_id = video_blob["id"]
-        video.webpage_url = video_blob["webpage_url"]
-        video.duration = video_blob["duration"]
-        video.extractor = video_blob["extractor"]
+        video = Video(**_video_row(video_blob))
 
     if add_to_playlist:
         video.playlists.append(add_to_playlist)
@@ -17,15 +39,148 @@ def store_video(video_blob, add_to_playlist=None):
     return video
 
 
+def _video_row(video_blob) -> Dict[str, Any]:
+    return {
+        "name": video_blob.get("title"),
+        "video_id": video_blob["id"],
+        "webpage_url": video_blob.get("webpage_url") or video_url(video_blob["id"]),
+        "duration": video_blob.get("duration"),
+        "extractor": _get_extractor(video_blob),
+    }
+
+
+def _get_extractor(video_blob) -> str:
+    if extractor := video_blob.get("extractor"):
+        return extractor
+    # unresolved playlist entries only carry the extractor's key
+    return (video_blob.get("ie_key") or "youtube").lower()
+
+
+def update_video(video: Video, video_blob) -> Video:
+    """
+    Fills in whatever metadata a video stored without extracting it is missing
+    """
+    video.name = video.name or video_blob.get("title")
+    video.webpage_url = video.webpage_url or video_blob.get("webpage_url")
+    video.duration = video.duration or video_blob.get("duration")
+    video.extractor = video_blob.get("extractor") or video.extractor
+    return video
+
+
+def find_videos(video_ids: Iterable[str]) -> Dict[str, Video]:
+    videos = {}
+    for batch in batched(set(video_ids)):
+        videos.update(
+            (video.video_id, video)
+            for video in Video.query.filter(Video.video_id.in_(batch))
+        )
+    return videos
+
+
+def store_videos(
+    session: Session, video_blobs: Iterable[Dict[str, Any]], add_to_playlist=None
+) -> Dict[str, Video]:
+    """
+    Bulk version of store_video. Existing videos are fetched with IN queries
+    and have their missing metadata filled in, missing videos are created
+    with multi row inserts and, if a playlist is provided, every video is
+    linked to it. The number of round trips depends on the number of batches
+    rather than the number of videos.
+
+    Returns the videos keyed by video id in the order they were provided.
+    Unavailable entries, which youtube-dl reports as None, are skipped.
+    """
+    blobs = {blob["id"]: blob for blob in video_blobs if blob}
+    videos = find_videos(blobs)
+
+    for video_id, video in videos.items():
+        update_video(video, blobs[video_id])
+
+    missing = [video_id for video_id in blobs if video_id not in videos]
+
+    for batch in batched(missing):
+        _insert_videos(session, [_video_row(blobs[id]) for id in batch])
+
+    if missing:
+        videos.update(find_videos(missing))
+
+    videos = {video_id: videos[video_id] for video_id in blobs}
+
+    if add_to_playlist is not None:
+        link_to_playlist(session, add_to_playlist, videos.values())
+
+    return videos
+
+
+def _insert_videos(session: Session, rows: List[Dict[str, Any]]) -> None:
+    # another process may have stored some of these since we looked, the
+    # unique video_id turns that into an IntegrityError for the whole batch
+    try:
+        with session.begin_nested():
+            session.execute(Video.__table__.insert(), rows)
+    except IntegrityError:
+        stored = find_videos(row["video_id"] for row in rows)
+        rows = [row for row in rows if row["video_id"] not in stored]
+        if rows:
+            _insert_videos(session, rows)
+
+
+def ensure_videos(session: Session, video_ids: Iterable[str]) -> Dict[str, Video]:
+    """
+    Finds videos by id, inserting bare rows for any that aren't stored yet so
+    they can be referenced without extracting them first. Their metadata can
+    be filled in later with update_video.
+    """
+    return store_videos(session, ({"id": id} for id in video_ids))
+
+
+def link_to_playlist(
+    session: Session, playlist: Playlist, videos: Iterable[Video]
+) -> None:
+    """
+    Inserts whichever video_to_playlist rows don't exist yet without loading
+    either side of the relationship.
+    """
+    videos = list(videos)
+    if playlist.id is None:
+        session.add(playlist)
+        session.flush()
+
+    video_pks = {video.id for video in videos}
+
+    linked = set()
+    for batch in batched(video_pks):
+        linked.update(
+            video_pk
+            for (video_pk,) in session.query(video_to_playlist.c.video_id).filter(
+                video_to_playlist.c.playlist_id == playlist.id,
+                video_to_playlist.c.video_id.in_(batch),
+            )
+        )
+
+    for batch in batched(video_pks - linked):
+        session.execute(
+            video_to_playlist.insert(),
+            [{"video_id": pk, "playlist_id": playlist.id} for pk in batch],
+        )
+
+    # the loaded collections don't know about rows inserted behind their back
+    session.expire(playlist, ["videos"])
+    for video in videos:
+        session.expire(video, ["playlists"])
+
+
 def store_playlist(playlist_blob):
     playlist = Playlist.query.filter(
         Playlist.playlist_id == playlist_blob["id"]
     ).first()
     if playlist is None:
         playlist = Playlist()
-        playlist.name = playlist_blob["title"]
         playlist.playlist_id = playlist_blob["id"]
-        playlist.extractor = playlist_blob["extractor"]
-        playlist.webpage_url = playlist_blob["webpage_url"]
+        playlist.extractor = _get_extractor(playlist_blob)
+        playlist.webpage_url = playlist_blob.get("webpage_url") or playlist_url(
+            playlist_blob["id"]
+        )
 
+    playlist.playlist_name = playlist.playlist_name or playlist_blob.get("title")
     return playlist
@@ -1,20 +1,74 @@
+import json
+import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from collections import deque
+from hashlib import blake2b
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 from youtube_dl import YoutubeDL
 
 from .download_archive import DownloadArchiveFactory, UseArchiveMixin
 from .configuration import OptionsFactory
+from .fragments import UseConcurrentFragmentsMixin
 from injector import inject
 
-class ArchivalYoutubeDl(UseArchiveMixin, YoutubeDL):
+logger = logging.getLogger(__name__)
+
+
+class ArchivalYoutubeDl(UseArchiveMixin, UseConcurrentFragmentsMixin, YoutubeDL):
     """
-    YoutubeDL that uses an external archive
+    YoutubeDL that uses an external archive and fetches fragments concurrently
+    when configured to
     """
 
     pass
 
 
+class PooledYoutubeDl(ArchivalYoutubeDl):
+    """
+    ArchivalYoutubeDl that goes back to its pool once the with block using
+    it exits
+    """
+
+    def __init__(self, *args, release: Callable[["PooledYoutubeDl"], None], **kwargs):
+        super().__init__(*args, **kwargs)
+        self._release = release
+        self._checked_out = False
+        # params as they were before any run could change them
+        self._pristine_params = dict(self.params)
+
+    def reset(self, progress_hooks: List[Callable], archive) -> None:
+        """
+        Drops whatever the previous run left behind and sets up the next one,
+        including the cookies it was sent and the opener holding them
+        """
+        self.params = dict(self._pristine_params, progress_hooks=progress_hooks)
+        self._setup_opener()
+        self._progress_hooks = list(progress_hooks)
+        self._download_retcode = 0
+        self._num_downloads = 0
+        self._dl_archive = archive
+        self._archive_precheck.clear()
+
+    def checkout(self, progress_hooks: List[Callable], archive) -> None:
+        self.reset(progress_hooks, archive)
+        self._checked_out = True
+
+    def __exit__(self, *args):
+        try:
+            return super().__exit__(*args)
+        finally:
+            # only the first exit returns it, a second one would hand the
+            # same instance out twice
+            if self._checked_out:
+                self._checked_out = False
+                # don't hold on to the hooks, they reference the finished run
+                self.reset([], None)
+                self._release(self)
+
+
 class YtdlFactory(ABC):
     @abstractmethod
     def get(self, **params: Dict[str, Any]) -> YoutubeDL:
@@ -34,3 +88,104 @@ class ArchivalYoutubeDlFactory(YtdlFactory):
         for factory in self._options_factories:
             factory.reconfigure(params)
         return ArchivalYoutubeDl(params, archive=self._archive_factory.get())
+
+
+class PooledYoutubeDlFactory(ArchivalYoutubeDlFactory):
+    """
+    Keeps YoutubeDL instances warm between runs so loading extractors is
+    paid once per set of options rather than once per run. Cookies and the
+    http opener are rebuilt for every run, one run's session never leaks
+    into the next.
+
+    Instances are pooled by a digest of their options, minus the progress
+    hooks which differ every run. Each instance is handed to one caller at a
+    time and goes back to the pool when the caller's with block exits,
+    instances used without one are simply never reused. At most max_idle
+    idle instances are kept per set of options and any idle for longer than
+    idle_timeout seconds are dropped. Options holding anything that can't be
+    told apart between runs, besides loggers, aren't pooled.
+    """
+
+    def __init__(
+        self,
+        archive_factory: DownloadArchiveFactory,
+        options_factories: List[OptionsFactory],
+        max_idle: int,
+        idle_timeout: float,
+    ) -> None:
+        super().__init__(archive_factory, options_factories)
+        self._max_idle = max_idle
+        self._idle_timeout = idle_timeout
+        self._idle: Dict[str, Deque[Tuple[float, PooledYoutubeDl]]] = {}
+        self._lock = Lock()
+
+    def get(self, **params: Dict[str, Any]) -> YoutubeDL:
+        for factory in self._options_factories:
+            factory.reconfigure(params)
+
+        progress_hooks = list(params.pop("progress_hooks", None) or [])
+        key = _options_key(params)
+        archive = self._archive_factory.get()
+
+        if key is None:
+            logger.debug("Options can't be pooled, creating an unpooled YoutubeDL")
+            params["progress_hooks"] = progress_hooks
+            return ArchivalYoutubeDl(params, archive=archive)
+
+        ytdl = self._checkout(key)
+
+        if ytdl is None:
+            logger.debug(f"Creating YoutubeDL for options {key}")
+            ytdl = PooledYoutubeDl(
+                params,
+                archive=archive,
+                release=lambda released: self._checkin(key, released),
+            )
+
+        ytdl.checkout(progress_hooks, archive)
+        return ytdl
+
+    def _checkout(self, key: str):
+        with self._lock:
+            self._evict(time.monotonic())
+            idle = self._idle.get(key)
+            return idle.pop()[1] if idle else None
+
+    def _checkin(self, key: str, ytdl: PooledYoutubeDl) -> None:
+        now = time.monotonic()
+
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            idle.append((now, ytdl))
+
+            while len(idle) > self._max_idle:
+                idle.popleft()
+
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        for key, idle in list(self._idle.items()):
+            # oldest first, the most recently used are taken from the right
+            while idle and now - idle[0][0] > self._idle_timeout:
+                idle.popleft()
+
+            if not idle:
+                del self._idle[key]
+
+
+def _options_key(params: Dict[str, Any]) -> Optional[str]:
+    try:
+        normalized = json.dumps(params, sort_keys=True, default=_identify)
+    except TypeError:
+        return None
+
+    return blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _identify(value: Any) -> str:
+    # loggers live as long as the process and are the same by name, anything
+    # else is only known by its id, which is reused once it's collected
+    if isinstance(value, logging.Logger):
+        return f"logging.Logger:{value.name}"
+
+    raise TypeError(f"Can't pool options holding {type(value).__qualname__}")
@@ -1,3 +1,6 @@
+from .archive import DownloadArchiveEntry
 from .download import Download, DownloadAttempt
 from .pagination import Pagination, PaginationData
+from .queue import QueuedDownload
+from .submission import DownloadSubmission, PlaylistDownloadProgress
 from .video import Playlist, Video
@@ -0,0 +1,18 @@
+from ..extensions import db
+from .base import BaseModel
+
+
+class DownloadArchiveEntry(BaseModel, db.Model):
+    __tablename__ = "download_archive_entries"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "archive_name",
+            "extractor",
+            "video_id",
+            name="uq_download_archive_entries_archive_extractor_video",
+        ),
+    )
+
+    archive_name: str = db.Column(db.String, nullable=False)
+    extractor: str = db.Column(db.String, nullable=False)
+    video_id: str = db.Column(db.String, nullable=False)
@@ -2,6 +2,9 @@ import json
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+from sqlalchemy import and_, func
+from sqlalchemy.orm import aliased
+
 from ..extensions import db
 from .base import BaseModel
 from .video import Video
@@ -11,20 +14,14 @@ class Download(BaseModel, db.Model):
     __tablename__ = "downloads"
 
     # uuid -- store as string for prototyping
-    download_id: str = db.Column(db.Text)
+    download_id: str = db.Column(db.Text, index=True, unique=True)
     block_further: bool = db.Column(db.Boolean, default=False)
     block_reason: str = db.Column(db.Text, nullable=True)
 
     # video can have multiple downloads
-    video_id: int = db.Column(db.Integer, db.ForeignKey("videos.id"))
+    video_id: int = db.Column(db.Integer, db.ForeignKey("videos.id"), index=True)
     video: Video = db.relationship(Video, backref=db.backref("downloads", lazy=True))
 
-    @property
-    def latest_attempt(self) -> Optional["DownloadAttempt"]:
-        if self.attempts:
-            return self.attempts[-1]
-        return None
-
     def start_new_attempt(self) -> "DownloadAttempt":
         attempt = DownloadAttempt()
         attempt.download = self
@@ -37,12 +34,18 @@ class Download(BaseModel, db.Model):
         self.block_further = True
         self.block_reason = f"Blocked at {when}: {reason}"
 
-        if propagate_to_latest_attempt and (attempt := dl.latest_attempt):
+        if propagate_to_latest_attempt and (attempt := self.latest_attempt):
             attempt.set_error(reason, when)
 
 
 class DownloadAttempt(BaseModel, db.Model):
     __tablename__ = "download_attempts"
+    __table_args__ = (
+        # serves both a download's attempts and finding its latest one
+        db.Index("ix_download_attempts_download_id_id", "download_id", "id"),
+        # keyset pages of attempts filtered by status
+        db.Index("ix_download_attempts_status_id", "status", "id"),
+    )
     # json blob, just store as str for now, it won't be queried
     options: str = db.Column(db.Text, default="{}")
     tmpfilename: str = db.Column(db.Text, nullable=True)
@@ -62,12 +65,26 @@ class DownloadAttempt(BaseModel, db.Model):
     message: str = db.Column(db.Text, nullable=True)
     download_id: int = db.Column(db.Integer, db.ForeignKey("downloads.id"))
     download: Download = db.relationship(
-        Download, backref=db.backref("attempts", lazy=False)
+        Download,
+        backref=db.backref("attempts", lazy=True, order_by="DownloadAttempt.id"),
     )
     video_id: int = db.Column(db.Integer, db.ForeignKey("videos.id"))
     video: Video = db.relationship(Video)
     task_id: str = db.Column(db.Text, nullable=True)
 
+    def resume_from(self, previous: "DownloadAttempt", downloaded_bytes: int) -> None:
+        """
+        Picks up the partial file previous left behind, downloaded_bytes is
+        how much of it is on disk
+        """
+        self.filename = previous.filename
+        self.tmpfilename = previous.tmpfilename
+        self.total_bytes = previous.total_bytes
+        self.downloaded_bytes = downloaded_bytes
+
+    def has_options_of(self, other: "DownloadAttempt") -> bool:
+        return _load_options(self.options) == _load_options(other.options)
+
     def set_options(self, options: Dict[str, Any]) -> None:
         options = options if options is not None else {}
         self.options = json.dumps(options)
@@ -115,3 +132,31 @@ class DownloadAttempt(BaseModel, db.Model):
 
         value = event_value if event_value is not None else existing_value
         setattr(self, attr_name, value)
+
+
+_other_attempt = aliased(DownloadAttempt)
+
+# the attempt with the highest id is the latest one, looked up through the
+# (download_id, id) index instead of loading every attempt. Loaded lazily by
+# default, use joinedload when fetching many downloads
+Download.latest_attempt = db.relationship(
+    DownloadAttempt,
+    primaryjoin=and_(
+        DownloadAttempt.download_id == Download.id,
+        DownloadAttempt.id
+        == db.select([func.max(_other_attempt.id)])
+        .where(_other_attempt.download_id == Download.id)
+        .correlate(Download)
+        .as_scalar(),
+    ),
+    uselist=False,
+    viewonly=True,
+)
+
+
+def _load_options(options: Optional[str]) -> Any:
+    try:
+        return json.loads(options) if options else {}
+    except ValueError:
+        # compared as is, the worker rejects them anyway
+        return options
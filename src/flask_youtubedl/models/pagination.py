@@ -4,12 +4,27 @@ M = T.TypeVar("M")
 
 
 class PaginationData:
+    """
+    Keyset pagination doesn't know which page it's on or how many items
+    there are, only whether there's more and where to pick up from
+    """
+
     page_size: int
-    page: int
-    total_items: int
     has_next_page: bool
+    next_cursor: T.Optional[str]
+
+    def __init__(
+        self, page_size: int, has_next_page: bool, next_cursor: T.Optional[str]
+    ):
+        self.page_size = page_size
+        self.has_next_page = has_next_page
+        self.next_cursor = next_cursor
 
 
 class Pagination(T.Generic[M]):
     items: T.List[M]
     meta: PaginationData
+
+    def __init__(self, items: T.List[M], meta: PaginationData):
+        self.items = items
+        self.meta = meta
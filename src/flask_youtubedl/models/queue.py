@@ -0,0 +1,17 @@
+from ..extensions import db
+from .base import BaseModel
+
+
+class QueuedDownload(BaseModel, db.Model):
+    """
+    A download of a slot, see worker.slots. Rows are kept until their
+    download is done, the oldest row of a slot is the download it runs.
+    """
+
+    __tablename__ = "queued_downloads"
+    __table_args__ = (db.Index("ix_queued_downloads_slot_id", "slot", "id"),)
+
+    slot: str = db.Column(db.Text, nullable=False)
+    download_id: str = db.Column(db.Text, nullable=False)
+    # json blob of the celery publish options, e.g. its lane's queue
+    publish_options: str = db.Column(db.Text, default="{}")
@@ -9,9 +9,9 @@ class SerializeResult(Generic[T]):
         self.errors = errors
 
     @staticmethod
-    def from_data(self, data: [T]) -> "SerializeResult[T]":
+    def from_data(data: [T]) -> "SerializeResult[T]":
         return SerializeResult(data, None)
 
     @staticmethod
-    def from_errors(self, errors: Dict[str, Any]) -> "SerializeResult[T]":
+    def from_errors(errors: Dict[str, Any]) -> "SerializeResult[T]":
         return SerializeResult(None, errors)
@@ -0,0 +1,49 @@
+import typing as T
+
+from .download import Download
+
+
+class DownloadSubmission:
+    """
+    Outcome of submitting a single video as part of a bulk submission
+    """
+
+    QUEUED = "queued"
+    EXISTING = "existing"
+    BLOCKED = "blocked"
+
+    video_id: str
+    status: str
+    download: T.Optional[Download]
+
+    def __init__(self, video_id: str, status: str, download: T.Optional[Download]):
+        self.video_id = video_id
+        self.status = status
+        self.download = download
+
+
+class PlaylistDownloadProgress:
+    """
+    Where the downloads for a playlist's videos stand, statuses counts the
+    status of each download's latest attempt
+    """
+
+    playlist_id: str
+    total: int
+    submitted: int
+    blocked: int
+    statuses: T.Dict[str, int]
+
+    def __init__(
+        self,
+        playlist_id: str,
+        total: int,
+        submitted: int,
+        blocked: int,
+        statuses: T.Dict[str, int],
+    ):
+        self.playlist_id = playlist_id
+        self.total = total
+        self.submitted = submitted
+        self.blocked = blocked
+        self.statuses = statuses
@@ -16,11 +16,11 @@ class Video(BaseModel, db.Model):
     __tablename__ = "videos"
 
     name: str = db.Column(db.String)
-    video_id: str = db.Column(db.String)
+    video_id: str = db.Column(db.String, index=True, unique=True)
     webpage_url: str = db.Column(db.String)
     duration: int = db.Column(db.Integer)
     status: str = db.Column(db.String)
-    extractor: str = db.Column(db.String)
+    extractor: str = db.Column(db.String, index=True)
 
     playlists: List["Playlist"] = db.relationship(
         lambda: Playlist,
@@ -35,5 +35,5 @@ class Playlist(BaseModel, db.Model):
 
     playlist_name: str = db.Column(db.String)
     extractor: str = db.Column(db.String)
-    playlist_id: str = db.Column(db.String)
+    playlist_id: str = db.Column(db.String, index=True)
     webpage_url: str = db.Column(db.String)
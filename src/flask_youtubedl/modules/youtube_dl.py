@@ -1,35 +1,73 @@
 import logging
+import os
 from typing import List
 
 from flask.config import Config
 from injector import Injector, provider, singleton, ClassProvider
+from redis import Redis
 from youtube_dl import YoutubeDL
 
-from ..config import YoutubeDlConfiguration, DownloadTaskConfig
+from ..config import DownloadTaskConfig, InfoCacheConfig, YoutubeDlConfiguration
+from ..core.artifacts import ArtifactStore, HardlinkArtifactStore, NullArtifactStore
 from ..core.configuration import OptionsFactory, OptionsFixer
 from ..core.download_archive import (
+    BloomFilterDownloadArchiveFactory,
     DownloadArchive,
     DownloadArchiveFactory,
     GenericeDownloadArchiveFactory,
+    IndexedFileDownloadArchive,
     LockedFileDownloadArchive,
     RedisDownloadArchive,
     RedisDownloadArchiveFactory,
     SetDownloadArchive,
+    SqlAlchemyDownloadArchiveFactory,
+)
+from ..core.info_cache import (
+    InfoCache,
+    LruInfoCache,
+    NullInfoCache,
+    RedisInfoCache,
+    RedisInvalidations,
+    TieredInfoCache,
+)
+from ..core.progress import (
+    LiveProgress,
+    NullLiveProgress,
+    NullProgressEvents,
+    ProgressEvents,
+    RedisLiveProgress,
+    RedisProgressEvents,
+)
+from ..core.rate_limit import (
+    DownloadLimiter,
+    ExtractorLimits,
+    NullDownloadLimiter,
+    RedisDownloadLimiter,
+)
+from ..core.single_flight import RedisSingleFlight, SingleFlight
+from ..core.ytdl_factory import (
+    ArchivalYoutubeDlFactory,
+    PooledYoutubeDlFactory,
+    YtdlFactory,
 )
-from ..core.ytdl_factory import ArchivalYoutubeDlFactory, YtdlFactory
 from ._helpers import FytdlModule, ClassProviderList
 
 logger = logging.getLogger(__name__)
 
 class YoutubeDLModule(FytdlModule):
     _ARCHIVE_PROVIDER_MAP = {
-        "file": lambda _: GenericeDownloadArchiveFactory(LockedFileDownloadArchive),
-        "set": lambda _: GenericeDownloadArchiveFactory(SetDownloadArchive),
+        # archives that hold state are shared across the process so their
+        # state survives between downloads
+        "file": lambda _: GenericeDownloadArchiveFactory(IndexedFileDownloadArchive()),
+        "locked_file": lambda _: GenericeDownloadArchiveFactory(
+            LockedFileDownloadArchive()
+        ),
+        "set": lambda _: GenericeDownloadArchiveFactory(SetDownloadArchive()),
         "redis": lambda i: i.get(RedisDownloadArchiveFactory),
+        "sqlalchemy": lambda i: i.get(SqlAlchemyDownloadArchiveFactory),
     }
 
     def configure(self, binder):
-        binder.bind(YtdlFactory, ArchivalYoutubeDlFactory)
         binder.multibind(
             List[OptionsFactory],
             to=ClassProviderList([
@@ -39,6 +77,22 @@ class YoutubeDLModule(FytdlModule):
             ]),
         )
 
+    @singleton
+    @provider
+    def provide_ytdl_factory(
+        self, ytdl_config: YoutubeDlConfiguration, injector: Injector
+    ) -> YtdlFactory:
+        if not ytdl_config.pool:
+            return injector.get(ArchivalYoutubeDlFactory)
+
+        # shared by the whole process so instances outlive the tasks using them
+        return PooledYoutubeDlFactory(
+            injector.get(DownloadArchiveFactory),
+            injector.get(List[OptionsFactory]),
+            max_idle=ytdl_config.pool_max_idle,
+            idle_timeout=ytdl_config.pool_idle_timeout,
+        )
+
     @provider
     def provide_youtubedl(self, factory: YtdlFactory) -> YoutubeDL:
         return factory.get()
@@ -53,17 +107,138 @@ class YoutubeDLModule(FytdlModule):
     def provide_task_configuration(self, app_config: Config) -> DownloadTaskConfig:
         return app_config["TASK"]
 
+    @singleton
+    @provider
+    def provide_info_cache_configuration(self, app_config: Config) -> InfoCacheConfig:
+        return app_config["INFO_CACHE"]
+
+    @singleton
+    @provider
+    def provide_info_cache(
+        self, cache_config: InfoCacheConfig, injector: Injector
+    ) -> InfoCache:
+        if not cache_config.enabled:
+            return NullInfoCache()
+
+        cache = LruInfoCache(max_size=cache_config.max_size, ttl=cache_config.ttl)
+
+        if cache_config.redis:
+            shared = RedisInfoCache(
+                injector.get(Redis),
+                ttl=cache_config.ttl,
+                prefix=cache_config.redis_prefix,
+            )
+            invalidations = RedisInvalidations(
+                injector.get(Redis), channel=cache_config.invalidation_channel
+            )
+            cache = TieredInfoCache(cache, shared, invalidations)
+
+        return cache
+
+    @singleton
+    @provider
+    def provide_single_flight(
+        self, cache_config: InfoCacheConfig, injector: Injector
+    ) -> SingleFlight:
+        # other processes can only share results through the redis cache tier
+        if cache_config.enabled and cache_config.redis:
+            return RedisSingleFlight(
+                injector.get(Redis),
+                prefix=cache_config.lock_prefix,
+                timeout=cache_config.lock_timeout,
+                wait=cache_config.lock_wait,
+            )
+
+        return SingleFlight()
+
+    @singleton
+    @provider
+    def provide_live_progress(
+        self, task_config: DownloadTaskConfig, injector: Injector
+    ) -> LiveProgress:
+        if task_config.progress_redis:
+            return RedisLiveProgress(
+                injector.get(Redis),
+                prefix=task_config.progress_redis_prefix,
+                ttl=task_config.progress_redis_ttl,
+            )
+
+        return NullLiveProgress()
+
+    @singleton
+    @provider
+    def provide_progress_events(
+        self, task_config: DownloadTaskConfig, injector: Injector
+    ) -> ProgressEvents:
+        if task_config.progress_redis:
+            return RedisProgressEvents(
+                injector.get(Redis), prefix=task_config.progress_events_prefix
+            )
+
+        return NullProgressEvents()
+
+    @singleton
+    @provider
+    def provide_artifact_store(
+        self, ytdl_config: YoutubeDlConfiguration
+    ) -> ArtifactStore:
+        if not ytdl_config.artifact_store:
+            return NullArtifactStore()
+
+        return HardlinkArtifactStore(
+            ytdl_config.artifact_store_path
+            or os.path.join(ytdl_config.base_download_path, ".artifacts")
+        )
+
+    @singleton
+    @provider
+    def provide_download_limiter(
+        self, task_config: DownloadTaskConfig, injector: Injector
+    ) -> DownloadLimiter:
+        if not task_config.rate_limit:
+            return NullDownloadLimiter()
+
+        defaults = ExtractorLimits(
+            per_minute=task_config.rate_limit_per_minute,
+            burst=task_config.rate_limit_burst,
+            concurrency=task_config.rate_limit_concurrency,
+        )
+        overrides = {
+            extractor.lower(): ExtractorLimits.with_overrides(defaults, limits)
+            for extractor, limits in task_config.rate_limit_extractors.items()
+        }
+
+        return RedisDownloadLimiter(
+            injector.get(Redis),
+            prefix=task_config.rate_limit_prefix,
+            defaults=defaults,
+            overrides=overrides,
+            lease_ttl=task_config.rate_limit_lease_ttl,
+            busy_countdown=task_config.rate_limit_busy_countdown,
+        )
+
     @singleton
     @provider
     def provide_download_archive_factory(
-        self, config: Config, injector: Injector
+        self, config: Config, ytdl_config: YoutubeDlConfiguration, injector: Injector
     ) -> DownloadArchiveFactory:
         archive_provider_name = (config.get("ARCHIVE_PROVIDER") or "file").lower()
         archive_provider = self._ARCHIVE_PROVIDER_MAP.get(
             archive_provider_name, self._ARCHIVE_PROVIDER_MAP["file"]
         )
         logger.info(f"Using archive provider: {archive_provider}")
-        return archive_provider(injector)
+        factory = archive_provider(injector)
+
+        if ytdl_config.archive_bloom_filter:
+            logger.info("Using bloom filter in front of archive provider")
+            factory = BloomFilterDownloadArchiveFactory(
+                factory,
+                capacity=ytdl_config.archive_bloom_filter_capacity,
+                error_rate=ytdl_config.archive_bloom_filter_error_rate,
+                refresh_interval=ytdl_config.archive_bloom_filter_refresh_interval,
+            )
+
+        return factory
 
     @provider
     def provide_download_archive(
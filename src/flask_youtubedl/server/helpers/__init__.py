@@ -1,4 +1,34 @@
+from .args import choice_arg, flag_arg
 from .blueprint import FytdlBlueprint
-from .serialize import serialize_with, read_from_body
+from .conditional import json_blob_response
+from .encoding import json_response
+from .fields import Fieldset
+from .jobs import job_accepted, wants_async_extraction
+from .serialize import (
+    dump_with,
+    read_from_args,
+    read_from_body,
+    serialize_paginated,
+    serialize_with,
+)
+from .stream import ndjson_response, sse_response, stream_chunk_size, wants_stream
 
-__all__ = ("FytdlBlueprint", "serialize_with")
+__all__ = (
+    "Fieldset",
+    "FytdlBlueprint",
+    "choice_arg",
+    "dump_with",
+    "flag_arg",
+    "job_accepted",
+    "json_blob_response",
+    "json_response",
+    "ndjson_response",
+    "read_from_args",
+    "read_from_body",
+    "serialize_paginated",
+    "serialize_with",
+    "sse_response",
+    "stream_chunk_size",
+    "wants_async_extraction",
+    "wants_stream",
+)
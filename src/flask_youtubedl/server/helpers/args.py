@@ -0,0 +1,29 @@
+from typing import Iterable
+
+from flask import abort, request
+
+__all__ = ("choice_arg", "flag_arg")
+
+_TRUTHY = frozenset(("1", "true", "yes", "on"))
+
+
+def flag_arg(name: str, default: bool = False) -> bool:
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.lower() in _TRUTHY
+
+
+def choice_arg(name: str, choices: Iterable[str], default: str) -> str:
+    """
+    One of choices from the query string, anything else is a 400
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+
+    value = value.lower()
+    if value not in choices:
+        abort(400, f"{name} must be one of {', '.join(sorted(choices))}")
+
+    return value
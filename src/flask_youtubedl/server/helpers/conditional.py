@@ -0,0 +1,76 @@
+from datetime import datetime
+from hashlib import blake2b
+from typing import Any, Iterable, Optional, Tuple
+
+from flask import current_app, request
+from flask.wrappers import Response
+from werkzeug.http import is_resource_modified
+
+from ...models.base import BaseModel
+
+__all__ = ("json_blob_response", "not_modified", "set_validators", "version_of")
+
+
+def version_of(parts: Iterable[Any]) -> Tuple[str, Optional[datetime]]:
+    """
+    Builds an ETag and Last-Modified from the rows a response is made of.
+    Rows contribute their table, id and last_modified, anything else that
+    goes into the response, e.g. progress that isn't stored yet, contributes
+    its repr. There's no telling when anything else last changed, so its
+    responses are tagged with just the ETag.
+    """
+    digest = blake2b(digest_size=16)
+    last_modified = None
+    unstored = False
+
+    for part in parts:
+        if isinstance(part, BaseModel):
+            version = f"{part.__tablename__}:{part.id}:{part.last_modified};"
+            digest.update(version.encode())
+            if part.last_modified and (
+                last_modified is None or part.last_modified > last_modified
+            ):
+                last_modified = part.last_modified
+        else:
+            digest.update(f"{part!r};".encode())
+            unstored = True
+
+    return digest.hexdigest(), None if unstored else last_modified
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Optional[Response]:
+    """
+    A 304 if the request's conditional headers match, otherwise None
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+
+    return set_validators(current_app.response_class(status=304), etag, last_modified)
+
+
+def set_validators(
+    response: Response, etag: str, last_modified: Optional[datetime]
+) -> Response:
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def json_blob_response(blob: str) -> Response:
+    """
+    Responds with already serialized JSON, tagged with a digest of it so
+    unchanged blobs are answered with a 304
+    """
+    etag = blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+    if (response := not_modified(etag, None)) is not None:
+        return response
+
+    response = current_app.response_class(
+        blob, mimetype=current_app.config["JSONIFY_MIMETYPE"]
+    )
+    return set_validators(response, etag, None)
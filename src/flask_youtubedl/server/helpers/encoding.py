@@ -0,0 +1,25 @@
+from typing import Any
+
+from flask import current_app, jsonify
+from flask.wrappers import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+__all__ = ("json_response",)
+
+
+def json_response(data: Any) -> Response:
+    """
+    jsonify, unless JSON_BACKEND is "orjson" and orjson is installed in which
+    case the same sorted keys output is produced considerably faster
+    """
+    if orjson is None or current_app.config.get("JSON_BACKEND") != "orjson":
+        return jsonify(data)
+
+    body = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return current_app.response_class(
+        body, mimetype=current_app.config["JSONIFY_MIMETYPE"]
+    )
@@ -0,0 +1,62 @@
+from typing import Tuple, Type
+
+from flask import abort, request
+from sqlalchemy.orm import load_only
+
+from ...core.compiled_schema import cached_schema
+from ...core.schema import SummarySchema
+
+__all__ = ("Fieldset",)
+
+
+class Fieldset:
+    """
+    The part of a summary schema a request asked for. ?fields=a,b picks plain
+    fields, all of them by default, and ?expand=x,y adds expandable
+    relationships, none by default. Unknown names are a 400.
+    """
+
+    def __init__(
+        self,
+        schema_cls: Type[SummarySchema],
+        fields: Tuple[str, ...],
+        expand: Tuple[str, ...],
+    ):
+        self.schema_cls = schema_cls
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, schema_cls: Type[SummarySchema]) -> "Fieldset":
+        plain_fields = schema_cls.plain_fields()
+        fields = _names_arg("fields", plain_fields) or plain_fields
+        expand = _names_arg("expand", schema_cls.expandable)
+        return cls(schema_cls, fields, expand)
+
+    def schema(self, **kwargs) -> SummarySchema:
+        # the same fieldset however the request spelled it, so clients can't
+        # fill the schema cache with permutations
+        only = tuple(sorted({*self.fields, *self.expand}))
+        return cached_schema(self.schema_cls, only=only, **kwargs)
+
+    def load_only(self):
+        """
+        Loader option for the columns behind the chosen fields, the primary
+        key is always loaded
+        """
+        return load_only(*{"id", *self.fields})
+
+    def expands(self, name: str) -> bool:
+        return name in self.expand
+
+
+def _names_arg(name: str, allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    value = request.args.get(name)
+    if not value:
+        return ()
+
+    names = tuple(dict.fromkeys(n.strip() for n in value.split(",") if n.strip()))
+    if unknown := set(names).difference(allowed):
+        abort(400, f"Unknown {name}: {', '.join(sorted(unknown))}")
+
+    return names
@@ -0,0 +1,27 @@
+from celery.result import AsyncResult
+from flask import current_app, jsonify, url_for
+from flask.wrappers import Response
+
+from .args import flag_arg
+
+__all__ = ("job_accepted", "wants_async_extraction")
+
+
+def wants_async_extraction() -> bool:
+    """
+    Extraction runs as a job when ASYNC_EXTRACTION is set, callers can
+    override that per request with ?async=true or ?async=false
+    """
+    return flag_arg(
+        "async", default=bool(current_app.config.get("ASYNC_EXTRACTION", False))
+    )
+
+
+def job_accepted(job: AsyncResult) -> Response:
+    status_url = url_for("jobs.job", job_id=job.id)
+    response = jsonify(
+        {"job_id": job.id, "status": job.state, "status_url": status_url}
+    )
+    response.status_code = 202
+    response.headers["Location"] = status_url
+    return response
@@ -1,22 +1,48 @@
 from functools import partial, wraps
-from typing import Type, Union
+from typing import Any, Callable, Iterable, Optional, Type, Union
 
-from flask import jsonify, request
+from flask import current_app, request
 from flask.wrappers import Response
 from marshmallow import Schema
 from marshmallow.class_registry import get_class as get_schema
 
-from ...core.schema import PaginationDataSchema
+from ...core.compiled_schema import cached_schema, dump
+from ...core.schema import PaginationDataSchema, SummarySchema
 from ...models import Pagination, PaginationData
-
-__all__ = ("serialize_with",)
+from .conditional import not_modified, set_validators, version_of
+from .encoding import json_response
+from .fields import Fieldset
+
+__all__ = (
+    "dump_with",
+    "read_from_args",
+    "read_from_body",
+    "serialize_paginated",
+    "serialize_with",
+)
 
 SCHEMA_LOOKUP_TYPE = Union[Type[Schema], Schema, str]
 
 
-def serialize_with(f=None, *, schema: SCHEMA_LOOKUP_TYPE, **kwargs):
+def serialize_with(
+    f=None,
+    *,
+    schema: SCHEMA_LOOKUP_TYPE,
+    versioned_by: Optional[Callable[[Any], Iterable[Any]]] = None,
+    **kwargs,
+):
+    """
+    Dumps whatever the wrapped function returns with the schema.
+
+    versioned_by receives the result and returns everything the response is
+    made of, see conditional.version_of. Successful responses are then tagged
+    with an ETag and Last-Modified and requests that already have the
+    current version are answered with a 304 without dumping anything.
+    """
     if f is None:
-        return partial(serialize_with, schema=schema, **kwargs)
+        return partial(
+            serialize_with, schema=schema, versioned_by=versioned_by, **kwargs
+        )
 
     schema = _get_schema(schema=schema, **kwargs)
 
@@ -28,22 +54,44 @@ def serialize_with(f=None, *, schema: SCHEMA_LOOKUP_TYPE, **kwargs):
             return result
 
         result, code, headers = _unpack_for_serialization(result)
-        return jsonify(schema.dump(result).data), code, headers
+
+        if versioned_by is None or code not in (None, 200):
+            return json_response(dump_with(schema, result)), code, headers
+
+        etag, last_modified = version_of(versioned_by(result))
+
+        if (response := not_modified(etag, last_modified)) is not None:
+            return response, None, headers
+
+        response = json_response(dump_with(schema, result))
+        return set_validators(response, etag, last_modified), code, headers
 
     return wrapper
 
 
 def serialize_paginated(f=None, *, schema: SCHEMA_LOOKUP_TYPE, **kwargs):
+    """
+    Dumps a Pagination's items with the schema, summary schemas are cut down
+    to the fields the request asked for, see Fieldset
+    """
     if f is None:
         return partial(serialize_paginated, schema=schema, **kwargs)
 
-    items_schema = _get_schema(schema=schema, **kwargs)
-    meta_schema = PaginationDataSchema()
+    summary = isinstance(schema, type) and issubclass(schema, SummarySchema)
+    if not summary:
+        items_schema = _get_schema(schema=schema, many=True, **kwargs)
+
+    def get_items_schema():
+        if summary:
+            return Fieldset.from_request(schema).schema(many=True, **kwargs)
+        return items_schema
+
+    meta_schema = cached_schema(PaginationDataSchema)
 
     def dump_pagination(paginated: Pagination):
         return {
-            "items": items_schema.dump(paginated.items).data,
-            "meta": meta_schema.dump(paginated.meta).data,
+            "items": dump_with(get_items_schema(), paginated.items),
+            "meta": dump_with(meta_schema, paginated.meta),
         }
 
     @wraps(f)
@@ -54,7 +102,9 @@ def serialize_paginated(f=None, *, schema: SCHEMA_LOOKUP_TYPE, **kwargs):
             return result
 
         result, code, headers = _unpack_for_serialization(result)
-        return jsonify(dump_pagination(result)), code, headers
+        return json_response(dump_pagination(result)), code, headers
+
+    return wrapper
 
 
 def read_from_body(
@@ -81,11 +131,44 @@ def read_from_body(
     return wrapper
 
 
+def read_from_args(
+    f=None, *, input_arg_name: str, schema: SCHEMA_LOOKUP_TYPE, **kwargs
+):
+    """
+    Same as read_from_body but reads the query string
+    """
+    if f is None:
+        return partial(
+            read_from_args, input_arg_name=input_arg_name, schema=schema, **kwargs
+        )
+
+    schema = _get_schema(schema=schema, **kwargs)
+
+    @wraps(f)
+    def wrapper(*a, **k):
+        k[input_arg_name] = schema.load(request.args)
+        return f(*a, **k)
+
+    return wrapper
+
+
+def dump_with(schema: Schema, obj: Any) -> Any:
+    """
+    schema.dump(obj).data, through the schema's compiled dump unless
+    COMPILED_SCHEMAS is turned off
+    """
+    if current_app.config.get("COMPILED_SCHEMAS", True):
+        return dump(schema, obj)
+    return schema.dump(obj).data
+
+
 def _get_schema(*, schema: SCHEMA_LOOKUP_TYPE, **kwargs) -> Schema:
     if isinstance(schema, str):
         schema = get_schema(schema)
 
-    if callable(schema) or issubclass(schema, Schema):
+    if isinstance(schema, type) and issubclass(schema, Schema):
+        schema = cached_schema(schema, **kwargs)
+    elif callable(schema):
         schema = schema(**kwargs)
 
     if not isinstance(schema, Schema):
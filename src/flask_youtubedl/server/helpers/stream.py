@@ -0,0 +1,54 @@
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from flask import current_app, stream_with_context
+from flask.wrappers import Response
+
+from ...core.utils import batched
+from .args import flag_arg
+
+__all__ = ("ndjson_response", "sse_response", "stream_chunk_size", "wants_stream")
+
+
+def wants_stream() -> bool:
+    return flag_arg("stream")
+
+
+def stream_chunk_size() -> int:
+    return current_app.config.get("STREAM_CHUNK_SIZE", 50)
+
+
+def ndjson_response(records: Iterable[Any]) -> Response:
+    """
+    Streams records as newline delimited JSON, written a chunk of records at
+    a time as the iterable produces them
+    """
+
+    def generate():
+        for chunk in batched(records, stream_chunk_size()):
+            yield "".join(f"{json.dumps(record)}\n" for record in chunk)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def sse_response(events: Iterable[Optional[Dict[str, Any]]]) -> Response:
+    """
+    Streams events as server sent events, each event's "event" key is used
+    as its type. None is written as a comment to keep idle connections open.
+    """
+
+    def generate():
+        for event in events:
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+
+            event_type = event.get("event", "message")
+            yield f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        # proxies mustn't hold events back until they've buffered enough
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,2 +1,4 @@
 from .download import DownloadView, download
 from .info import PlaylistView, VideoView, info
+from .jobs import JobView, jobs
+from .listing import listing
@@ -1,35 +1,74 @@
+from contextlib import closing
 from datetime import datetime
-from typing import Optional
-from uuid import uuid4
+from typing import Any, Dict, List, Optional
 
 from flask import abort
 from flask.views import MethodView
 from injector import inject
-from sqlalchemy.orm import Session
-from youtube_dl import YoutubeDL
+from sqlalchemy.orm import Session, joinedload
 
+from ...core.progress import PROGRESS_FIELDS, LiveProgress, ProgressEvents
 from ...core.schema import (
+    BulkDownloadRequestSchema,
     DownloadAttemptSchema,
     DownloadSchema,
+    DownloadSubmissionSchema,
+    PlaylistDownloadProgressSchema,
+    PlaylistDownloadRequestSchema,
     YtdlDownloadOptionsSchema,
 )
-from ...core.utils import store_video
 from ...core.ytdl_options import YtdlDownloadOptions
+from ...config import DownloadTaskConfig
 from ...extensions import celery
 from ...models import Download, DownloadAttempt, Video
 from ...models.serialize_result import SerializeResult
-from ...worker.tasks import cleanup_attempt, process_video_download
-from ..helpers import FytdlBlueprint, read_from_body, serialize_with
+from ...worker.jobs import submit_download
+from ...worker.submit import DownloadBlocked, DownloadSubmitter
+from ...worker.tasks import cleanup_attempt
+from ...worker.lanes import NORMAL, PRIORITIES
+from ..helpers import (
+    FytdlBlueprint,
+    choice_arg,
+    flag_arg,
+    job_accepted,
+    read_from_body,
+    serialize_with,
+    sse_response,
+    wants_async_extraction,
+)
 
-__all__ = ("DownloadView", "download")
+__all__ = (
+    "BulkDownloadView",
+    "DownloadEventsView",
+    "DownloadView",
+    "PlaylistDownloadView",
+    "download",
+)
 
 download = FytdlBlueprint("download", __name__, url_prefix="/download")
 
 
+def _download_parts(dl: Download) -> List[Any]:
+    # latest_attempt is one of the attempts
+    return [dl, dl.video, *dl.video.playlists, *dl.attempts]
+
+
+def _attempt_parts(live: "_LiveAttempt") -> List[Any]:
+    attempt = live.stored
+    parts = [attempt, attempt.download, attempt.video, *attempt.video.playlists]
+
+    # the stored row versions everything but the live progress, which
+    # doesn't have a last_modified of its own
+    if live.progress is not None:
+        parts.extend(live.progress.get(field) for field in PROGRESS_FIELDS)
+
+    return parts
+
+
 class DownloadView(MethodView):
     @inject
-    def __init__(self, ytdl: YoutubeDL, session: Session):
-        self._ytdl = ytdl
+    def __init__(self, submitter: DownloadSubmitter, session: Session):
+        self._submitter = submitter
         self._session = session
         self._options_schmea = YtdlDownloadOptionsSchema()
 
@@ -41,36 +80,26 @@ class DownloadView(MethodView):
         if dl and dl.block_further:
             abort(403)
 
-        if dl is None:
-            if options is None:
-                options = SerializeResult.from_data(YtdlDownloadOptions())
+        if options is None:
+            options = SerializeResult.from_data(YtdlDownloadOptions())
 
-            if options.errors:
-                abort(400)
+        if dl is None and options.errors:
+            abort(400)
 
-            info = self._ytdl.extract_info(
-                f"https://www.youtube.com/watch?v={video_id}", download=False
-            )
-            video = store_video(info)
-            dl = Download()
-            dl.download_id = str(uuid4())
-            dl.video = video
-            self._session.add(dl)
-
-        if (
-            not dl.latest_attempt
-            or dl.latest_attempt.is_failed()
-            or dl.latest_attempt.is_canceled()
-        ):
-            attempt = dl.start_new_attempt()
-            attempt.set_options(self._options_schmea.dump(options.data).data)
-            self._session.add(attempt)
-            self._session.commit()
-            process_video_download.delay(str(dl.download_id))
+        run_options = self._options_schmea.dump(options.data).data
+        priority = _priority()
 
-        return dl
+        if dl is None and wants_async_extraction():
+            return job_accepted(submit_download.delay(video_id, run_options, priority))
 
-    @serialize_with(schema=DownloadSchema)
+        try:
+            return self._submitter.submit(
+                video_id, run_options, dl=dl, priority=priority
+            )
+        except DownloadBlocked:
+            abort(403)
+
+    @serialize_with(schema=DownloadSchema, versioned_by=_download_parts)
     def get(self, video_id: str):
         dl = self._get_download_from_video_id(video_id)
         if not dl:
@@ -78,60 +107,211 @@ class DownloadView(MethodView):
         return dl
 
     def delete(self, video_id: str) -> None:
+        """
+        Cancels the download's latest attempt. Its partial file is kept for
+        the next attempt to resume from unless ?abandon=true, which removes
+        it even if the attempt had already stopped. Kept partials stay until
+        a later attempt resumes or replaces them, nothing expires them.
+        """
         dl = self._get_download_from_video_id(video_id)
         if not dl:
             return "", 204
 
         attempt = dl.latest_attempt
 
-        if (
-            not attempt
-            or attempt.is_failed()
-            or attempt.is_canceled()
-            or attempt.is_finished()
-        ):
+        if not attempt or attempt.is_finished():
             return "", 204
 
-        attempt.set_canceled(datetime.utcnow())
-        self._session.commit()
+        if attempt.is_pending() or attempt.is_downloading():
+            downloading = attempt.is_downloading()
+            attempt.set_canceled(datetime.utcnow())
+            self._session.commit()
 
-        async_result = celery.AsyncResult(attempt.task_id)
-        if attempt.is_pending():
-            async_result.revoke()
+            # attempts queued by a submission get their task id once picked up
+            if attempt.task_id:
+                async_result = celery.AsyncResult(attempt.task_id)
+                if downloading:
+                    async_result.revoke(terminate=True, signal="SIGUSR1")
+                else:
+                    async_result.revoke()
 
-        elif attempt.is_downloading():
-            async_result.revoke(terminate=True, signal="SIGUSR1")
+        if flag_arg("abandon"):
+            cleanup_attempt.delay(attempt.id)
 
-        cleanup_attempt.delay(attempt.id)
         return "", 204
 
     def _get_download_from_video_id(self, video_id) -> Optional[Download]:
-        return (
-            Download.query.join(Video, Download.video)
-            .join(DownloadAttempt, Download.attempts)
-            .filter(Video.video_id == video_id)
-            .first()
+        return self._submitter.find(video_id)
+
+
+class BulkDownloadView(MethodView):
+    @inject
+    def __init__(self, submitter: DownloadSubmitter):
+        self._submitter = submitter
+        self._options_schmea = YtdlDownloadOptionsSchema()
+
+    @serialize_with(schema=DownloadSubmissionSchema, many=True)
+    @read_from_body(input_arg_name="submission", schema=BulkDownloadRequestSchema)
+    def post(self, submission):
+        if submission.errors:
+            abort(400)
+
+        run_options = self._options_schmea.dump(submission.data["options"]).data
+        return self._submitter.submit_many(
+            submission.data["video_ids"], run_options, priority=_priority()
+        )
+
+
+class PlaylistDownloadView(MethodView):
+    @inject
+    def __init__(self, submitter: DownloadSubmitter, task_config: DownloadTaskConfig):
+        self._submitter = submitter
+        self._task_config = task_config
+        self._options_schmea = YtdlDownloadOptionsSchema()
+
+    @serialize_with(schema=PlaylistDownloadProgressSchema)
+    @read_from_body(input_arg_name="submission", schema=PlaylistDownloadRequestSchema)
+    def post(self, playlist_id: str, submission):
+        if submission.errors:
+            abort(400)
+
+        run_options = self._options_schmea.dump(submission.data["options"]).data
+        concurrency = (
+            submission.data["concurrency"] or self._task_config.playlist_concurrency
+        )
+        return self._submitter.submit_playlist(
+            playlist_id, run_options, concurrency, priority=_priority()
         )
 
+    @serialize_with(schema=PlaylistDownloadProgressSchema)
+    def get(self, playlist_id: str):
+        progress = self._submitter.playlist_progress(playlist_id)
+        if progress is None:
+            abort(404)
+        return progress
+
 
 class LatestDownloadAttempt(MethodView):
-    @serialize_with(schema=DownloadAttemptSchema)
+    @inject
+    def __init__(self, live_progress: LiveProgress):
+        self._live_progress = live_progress
+
+    @serialize_with(schema=DownloadAttemptSchema, versioned_by=_attempt_parts)
     def get(self, video_id: str):
-        dl = (
-            Download.query.join(Video, Download.video)
-            .join(DownloadAttempt, Download.attempts)
-            .filter(Video.video_id == video_id)
-            .first()
-        )
+        if not (attempt := _latest_attempt(video_id)):
+            abort(404)
+
+        return _LiveAttempt.of(attempt, self._live_progress)
+
+
+class DownloadEventsView(MethodView):
+    """
+    Streams a video's download progress as server sent events. The first
+    event is a snapshot of the latest attempt, followed by whatever the
+    worker publishes until it's done with the download.
+    """
+
+    @inject
+    def __init__(
+        self,
+        session: Session,
+        live_progress: LiveProgress,
+        events: ProgressEvents,
+        task_config: DownloadTaskConfig,
+    ):
+        self._session = session
+        self._live_progress = live_progress
+        self._events = events
+        self._task_config = task_config
+
+    def get(self, video_id: str):
+        # progress is only published where the web process can see it with redis
+        if not self._task_config.progress_redis:
+            abort(404)
 
-        if not dl or not (attempt := dl.latest_attempt):
+        if not (attempt := _latest_attempt(video_id)):
             abort(404)
 
-        return attempt
+        events = self._events.listen(
+            video_id, timeout=self._task_config.progress_events_keepalive
+        )
+        # read the checkpoint after subscribing so nothing falls in between
+        self._session.refresh(attempt)
+        live = _LiveAttempt.of(attempt, self._live_progress)
+        snapshot = {field: getattr(live, field) for field in PROGRESS_FIELDS}
+        snapshot.update(event="snapshot", attempt_id=attempt.id)
+        settled = attempt.is_finished() or attempt.is_failed() or attempt.is_canceled()
+
+        # don't hold on to a connection for as long as the client listens
+        self._session.close()
+
+        if settled:
+            events.close()
+
+        def stream():
+            with closing(events):
+                yield snapshot
+
+                for event in events:
+                    yield event
+                    if event and event["event"] == "done":
+                        return
+
+        return sse_response(stream())
+
+
+def _priority() -> str:
+    # ?priority= orders downloads within their lane
+    return choice_arg("priority", PRIORITIES, default=NORMAL)
+
+
+def _latest_attempt(video_id: str) -> Optional[DownloadAttempt]:
+    dl = (
+        Download.query.join(Video, Download.video)
+        .options(joinedload(Download.latest_attempt))
+        .filter(Video.video_id == video_id)
+        .order_by(Download.id)
+        .first()
+    )
+    return dl.latest_attempt if dl else None
+
+
+class _LiveAttempt:
+    """
+    An attempt as responses show it, the live progress of an attempt that's
+    downloading in place of its last checkpoint. Everything else is read
+    from the stored attempt, which is never written to: it's still in the
+    session and the next query would flush whatever was set on it.
+    """
+
+    def __init__(self, stored: DownloadAttempt, progress: Optional[Dict[str, Any]]):
+        self.stored = stored
+        self.progress = progress
+
+    @classmethod
+    def of(
+        cls, attempt: DownloadAttempt, live_progress: LiveProgress
+    ) -> "_LiveAttempt":
+        progress = live_progress.get(attempt.id) if attempt.is_downloading() else None
+        return cls(attempt, progress)
+
+    def __getattr__(self, name: str) -> Any:
+        if self.progress is not None and name in PROGRESS_FIELDS:
+            return self.progress.get(name)
+        return getattr(self.stored, name)
 
 
 download.add_url_rule("/video/<video_id>", view_func=DownloadView.as_view("download"))
+download.add_url_rule("/videos", view_func=BulkDownloadView.as_view("bulk_download"))
+download.add_url_rule(
+    "/playlist/<playlist_id>",
+    view_func=PlaylistDownloadView.as_view("playlist_download"),
+)
 download.add_url_rule(
     "/video/<video_id>/latest",
     view_func=LatestDownloadAttempt.as_view("latest_attempt"),
 )
+download.add_url_rule(
+    "/video/<video_id>/events",
+    view_func=DownloadEventsView.as_view("download_events"),
+)
@@ -1,68 +1,159 @@
+from contextlib import ExitStack, closing
+
 from flask import jsonify
 from flask.views import MethodView
 from injector import inject
 from sqlalchemy.orm import Session
-from youtube_dl import YoutubeDL
 
+from ...core.extraction import InfoExtractor
+from ...core.info_cache import InfoCache
 from ...core.schema import PlaylistSchema, VideoSchema
-from ...core.utils import store_playlist, store_video
+from ...core.utils import (
+    batched,
+    playlist_url,
+    store_playlist,
+    store_video,
+    store_videos,
+    video_url,
+)
 from ...models import Playlist, Video
-from ..helpers import FytdlBlueprint, serialize_with
+from ...worker.jobs import extract_info, store_playlist_info, store_video_info
+from ..helpers import (
+    FytdlBlueprint,
+    job_accepted,
+    json_blob_response,
+    ndjson_response,
+    serialize_with,
+    stream_chunk_size,
+    wants_async_extraction,
+    wants_stream,
+)
 
 
-__all__ = ("info", "PlaylistView", "VideoView")
+__all__ = ("info", "InfoCacheView", "PlaylistView", "VideoView")
 
 info = FytdlBlueprint("info", __name__, url_prefix="/info")
 
 
 class PlaylistView(MethodView):
     @inject
-    def __init__(self, ytdl: YoutubeDL, session: Session):
-        self._ytdl = ytdl
+    def __init__(self, extractor: InfoExtractor, session: Session):
+        self._extractor = extractor
         self._session = session
+        self._playlist_schema = PlaylistSchema(exclude=("videos",))
+        self._video_schema = VideoSchema(exclude=("downloads", "playlists"))
 
     def get(self, id: str):
-        info = self._ytdl.extract_info(
-            f"https://www.youtube.com/playlist?list={id}", download=False
-        )
-        return jsonify(info)
+        if wants_stream():
+            return self._stream(id)
+
+        if wants_async_extraction():
+            return job_accepted(extract_info.delay(playlist_url(id)))
+
+        return json_blob_response(self._extractor.extract_serialized(playlist_url(id)))
 
     @serialize_with(schema=PlaylistSchema)
     def post(self, id: str):
-        info = self._ytdl.extract_info(
-            f"https://www.youtube.com/playlist?list={id}", download=False
-        )
-        playlist = store_playlist(info)
-        for video in info["entries"]:
-            store_video(video, playlist)
+        if wants_stream():
+            return self._stream_and_store(id)
+
+        if wants_async_extraction():
+            return job_accepted(store_playlist_info.delay(id))
 
+        info = self._extractor.extract(playlist_url(id))
+        playlist = store_playlist(info)
         self._session.add(playlist)
+        store_videos(self._session, info["entries"], playlist)
         self._session.commit()
         return playlist
 
+    def _stream(self, id: str):
+        """
+        Writes the playlist and then its unresolved entries as NDJSON while
+        the entries are still being fetched
+        """
+        info, entries = self._extractor.extract_lazily(playlist_url(id))
+
+        def records():
+            with closing(entries):
+                yield {"type": "playlist", "playlist": info}
+                for entry in entries:
+                    yield {"type": "entry", "entry": entry}
+
+        return ndjson_response(records())
+
+    def _stream_and_store(self, id: str):
+        """
+        Stores the playlist's unresolved entries a chunk at a time, writing
+        each chunk as NDJSON once it's committed
+        """
+        info, entries = self._extractor.extract_lazily(playlist_url(id))
+
+        with ExitStack() as stack:
+            # the entries hold on to a YoutubeDL until they're closed
+            stack.callback(entries.close)
+            playlist = store_playlist(info)
+            self._session.add(playlist)
+            self._session.commit()
+            stack.pop_all()
+
+        def records():
+            with closing(entries):
+                yield {
+                    "type": "playlist",
+                    "playlist": self._playlist_schema.dump(playlist).data,
+                }
+
+                for chunk in batched(entries, stream_chunk_size()):
+                    videos = store_videos(self._session, chunk, playlist)
+                    self._session.commit()
+
+                    for video in videos.values():
+                        video = self._video_schema.dump(video).data
+                        yield {"type": "video", "video": video}
+
+        return ndjson_response(records())
+
 
 class VideoView(MethodView):
     @inject
-    def __init__(self, ytdl: YoutubeDL, session: Session):
-        self._ytdl = ytdl
+    def __init__(self, extractor: InfoExtractor, session: Session):
+        self._extractor = extractor
         self._session = session
 
     def get(self, id: str):
-        info = self._ytdl.extract_info(
-            f"https://www.youtube.com/watch?v={id}", download=False
-        )
-        return jsonify(info)
+        if wants_async_extraction():
+            return job_accepted(extract_info.delay(video_url(id)))
+
+        return json_blob_response(self._extractor.extract_serialized(video_url(id)))
 
     @serialize_with(schema=VideoSchema)
     def post(self, id: str):
-        info = self._ytdl.extract_info(
-            f"https://www.youtube.com/watch?v={id}", download=False
-        )
+        if wants_async_extraction():
+            return job_accepted(store_video_info.delay(id))
+
+        info = self._extractor.extract(video_url(id))
         video = store_video(info)
         self._session.add(video)
         self._session.commit()
         return video
 
 
+class InfoCacheView(MethodView):
+    """
+    Hits, misses, evictions and so on of the info cache since this process
+    started, per tier. Every process keeps its own, this is the one that
+    answered the request.
+    """
+
+    @inject
+    def __init__(self, cache: InfoCache):
+        self._cache = cache
+
+    def get(self):
+        return jsonify(self._cache.report())
+
+
+info.add_url_rule("/cache", view_func=InfoCacheView.as_view("cache"))
 info.add_url_rule("/video/<id>", view_func=VideoView.as_view("video"))
 info.add_url_rule("/playlist/<id>", view_func=PlaylistView.as_view("playlist"))
@@ -0,0 +1,30 @@
+from flask import jsonify
+from flask.views import MethodView
+
+from ...extensions import celery
+from ..helpers import FytdlBlueprint
+
+__all__ = ("JobView", "jobs")
+
+jobs = FytdlBlueprint("jobs", __name__, url_prefix="/jobs")
+
+
+class JobView(MethodView):
+    def get(self, job_id: str):
+        # celery reports unknown ids as PENDING, so a typo'd id polls forever
+        # rather than 404ing
+        job = celery.AsyncResult(job_id)
+        body = {"job_id": job.id, "status": job.state}
+
+        if job.successful():
+            body["result"] = job.result
+            return jsonify(body)
+
+        if job.failed():
+            body["error"] = f"{job.result.__class__.__name__}: {job.result}"
+            return jsonify(body)
+
+        return jsonify(body), 202
+
+
+jobs.add_url_rule("/<job_id>", view_func=JobView.as_view("job"))
@@ -0,0 +1,232 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from flask import abort
+from flask.views import MethodView
+from sqlalchemy.orm import Query, joinedload, noload, selectinload
+
+from ...core.pagination import InvalidCursor, paginate
+from ...core.schema import (
+    DownloadAttemptSummarySchema,
+    DownloadSummarySchema,
+    ListingArgsSchema,
+    PlaylistSummarySchema,
+    VideoSummarySchema,
+)
+from ...models import Download, DownloadAttempt, Playlist, Video
+from ..helpers import Fieldset, FytdlBlueprint, read_from_args, serialize_paginated
+
+__all__ = (
+    "AttemptListView",
+    "DownloadListView",
+    "PlaylistListView",
+    "VideoListView",
+    "listing",
+)
+
+listing = FytdlBlueprint("listing", __name__, url_prefix="/listing")
+
+
+class ListView(MethodView):
+    """
+    Pages through a model newest first, see core.pagination.paginate. Filters
+    that don't apply to the model are ignored. Items are dumped with the
+    model's summary schema and only the columns and relationships the
+    request's Fieldset needs are loaded.
+    """
+
+    model = None
+    schema = None
+
+    @read_from_args(input_arg_name="args", schema=ListingArgsSchema)
+    def get(self, args):
+        if args.errors:
+            abort(400)
+
+        fieldset = Fieldset.from_request(self.schema)
+        query = self.query(args.data).options(
+            fieldset.load_only(), *self.load_options(fieldset)
+        )
+        created = self.model.created
+
+        if created_after := _as_naive_utc(args.data["created_after"]):
+            query = query.filter(created >= created_after)
+
+        if created_before := _as_naive_utc(args.data["created_before"]):
+            query = query.filter(created < created_before)
+
+        try:
+            return paginate(
+                query,
+                self.model.id,
+                page_size=args.data["page_size"],
+                cursor=args.data["cursor"],
+            )
+        except InvalidCursor:
+            abort(400)
+
+    def query(self, args: Dict[str, Any]) -> Query:
+        raise NotImplementedError()
+
+    def load_options(self, fieldset: Fieldset) -> List[Any]:
+        return []
+
+
+class DownloadListView(ListView):
+    model = Download
+    schema = DownloadSummarySchema
+
+    @serialize_paginated(schema=DownloadSummarySchema)
+    def get(self):
+        return super().get()
+
+    def query(self, args: Dict[str, Any]) -> Query:
+        query = Download.query
+
+        if args["extractor"]:
+            query = query.join(Video, Download.video).filter(
+                Video.extractor == args["extractor"]
+            )
+
+        if args["status"]:
+            query = query.join(Download.latest_attempt).filter(
+                DownloadAttempt.status == _status(args["status"])
+            )
+
+        return query
+
+    def load_options(self, fieldset: Fieldset) -> List[Any]:
+        options = []
+
+        if fieldset.expands("video"):
+            options.append(_load_video(joinedload(Download.video)))
+
+        if fieldset.expands("latest_attempt"):
+            options.append(_load_attempt(joinedload(Download.latest_attempt)))
+
+        if fieldset.expands("attempts"):
+            options.append(_load_attempt(selectinload(Download.attempts)))
+
+        return options
+
+
+class AttemptListView(ListView):
+    model = DownloadAttempt
+    schema = DownloadAttemptSummarySchema
+
+    @serialize_paginated(schema=DownloadAttemptSummarySchema)
+    def get(self):
+        return super().get()
+
+    def query(self, args: Dict[str, Any]) -> Query:
+        query = DownloadAttempt.query
+
+        if args["extractor"]:
+            query = query.join(Video, DownloadAttempt.video).filter(
+                Video.extractor == args["extractor"]
+            )
+
+        if args["status"]:
+            query = query.filter(DownloadAttempt.status == _status(args["status"]))
+
+        return query
+
+    def load_options(self, fieldset: Fieldset) -> List[Any]:
+        options = []
+
+        if fieldset.expands("download"):
+            options.append(
+                joinedload(DownloadAttempt.download).load_only(
+                    *DownloadSummarySchema.plain_fields()
+                )
+            )
+
+        if fieldset.expands("video"):
+            options.append(_load_video(joinedload(DownloadAttempt.video)))
+
+        return options
+
+
+class VideoListView(ListView):
+    model = Video
+    schema = VideoSummarySchema
+
+    @serialize_paginated(schema=VideoSummarySchema)
+    def get(self):
+        return super().get()
+
+    def query(self, args: Dict[str, Any]) -> Query:
+        query = Video.query
+
+        if args["extractor"]:
+            query = query.filter(Video.extractor == args["extractor"])
+
+        if args["status"]:
+            query = query.filter(Video.status == args["status"])
+
+        return query
+
+    def load_options(self, fieldset: Fieldset) -> List[Any]:
+        options = []
+
+        if fieldset.expands("downloads"):
+            options.append(
+                selectinload(Video.downloads).load_only("id", "download_id")
+            )
+
+        if fieldset.expands("playlists"):
+            options.append(
+                selectinload(Video.playlists).load_only(
+                    *PlaylistSummarySchema.plain_fields()
+                )
+            )
+        else:
+            options.append(noload(Video.playlists))
+
+        return options
+
+
+class PlaylistListView(ListView):
+    model = Playlist
+    schema = PlaylistSummarySchema
+
+    @serialize_paginated(schema=PlaylistSummarySchema)
+    def get(self):
+        return super().get()
+
+    def query(self, args: Dict[str, Any]) -> Query:
+        query = Playlist.query
+
+        if args["extractor"]:
+            query = query.filter(Playlist.extractor == args["extractor"])
+
+        return query
+
+
+def _load_video(option):
+    # playlists aren't part of the summary but are eagerly loaded by default
+    return option.load_only(*VideoSummarySchema.plain_fields()).noload(
+        Video.playlists
+    )
+
+
+def _load_attempt(option):
+    return option.load_only(*DownloadAttemptSummarySchema.plain_fields())
+
+
+def _status(status: str) -> str:
+    # attempts store their status capitalized, e.g. Downloading
+    return status.capitalize()
+
+
+def _as_naive_utc(when: Optional[datetime]) -> Optional[datetime]:
+    # created is stored as naive utc
+    if when is not None and when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    return when
+
+
+listing.add_url_rule("/downloads", view_func=DownloadListView.as_view("downloads"))
+listing.add_url_rule("/attempts", view_func=AttemptListView.as_view("attempts"))
+listing.add_url_rule("/videos", view_func=VideoListView.as_view("videos"))
+listing.add_url_rule("/playlists", view_func=PlaylistListView.as_view("playlists"))
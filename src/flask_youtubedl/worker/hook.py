@@ -3,9 +3,10 @@ from datetime import datetime
 from typing import Any, Dict
 
 from injector import inject
-from sqlalchemy.orm import Session
 
 from ..core.hook import AbstractYtdlHook
+from ..core.progress import ProgressSink
+from ..core.retry import TRANSIENT, classify_error
 from ..core.task import DownloadTask, DownloadTaskOnError
 from ..models import Download, DownloadAttempt
 
@@ -13,22 +14,21 @@ logger = logging.getLogger(__name__)
 
 
 class DownloadAttemptHook(AbstractYtdlHook):
-    def __init__(self, attempt: DownloadAttempt, session: Session):
+    def __init__(self, attempt: DownloadAttempt, sink: ProgressSink):
         self._attempt = attempt
-        self._session = session
+        self._sink = sink
         super().__init__()
 
     def downloading(self, event: Dict[str, Any]) -> Any:
-        self._attempt.set_downloading(event)
-        self._session.commit()
+        self._sink.update(event)
 
     def error(self, event) -> Any:
         self._attempt.set_error("Download failed", datetime.utcnow())
-        self._session.commit()
+        self._sink.checkpoint()
 
     def finished(self, event) -> Any:
         self._attempt.set_finished(datetime.utcnow())
-        self._session.commit()
+        self._sink.checkpoint()
 
     def unknown(self, event) -> Any:
         logger.warning(f"Received unknown event {event!r}")
@@ -57,3 +57,31 @@ class TooManyFailedAttempts(DownloadTaskOnError):
                 when=datetime.utcnow(),
                 propagate_to_latest_attempt=False,
             )
+
+
+class RetryTransientFailures(DownloadTaskOnError):
+    """
+    Classifies why the attempt failed, see core.retry.classify_error, so the
+    worker can retry transient failures while the download has attempts left
+    """
+
+    def __init__(self, attempt: DownloadAttempt, download: Download, max_attempts: int):
+        self._attempt = attempt
+        self._download = download
+        self._max_attempts = max_attempts
+        self.classification = None
+
+    def on_error(self, task: DownloadTask, exception: Exception) -> None:
+        self.classification = classify_error(exception)
+        logger.info(f"Attempt {self._attempt.id} failed, {self.classification} error")
+
+    def failed_attempts(self) -> int:
+        return sum(1 for a in self._download.attempts if a.is_failed())
+
+    def should_retry(self) -> bool:
+        return (
+            self.classification == TRANSIENT
+            and self._attempt.is_failed()
+            and not self._download.block_further
+            and self.failed_attempts() < self._max_attempts
+        )
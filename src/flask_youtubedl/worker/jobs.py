@@ -0,0 +1,66 @@
+"""
+Tasks that run metadata extraction off the request path. Each one returns
+the same payload the synchronous endpoint would have, clients collect it
+from the job status endpoint.
+"""
+import logging
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from ..core.extraction import InfoExtractor
+from ..core.schema import DownloadSchema, PlaylistSchema, VideoSchema
+from ..core.utils import (
+    playlist_url,
+    store_playlist,
+    store_video,
+    store_videos,
+    video_url,
+)
+from ..extensions import celery
+from .lanes import NORMAL
+from .submit import DownloadSubmitter
+
+__all__ = (
+    "extract_info",
+    "store_playlist_info",
+    "store_video_info",
+    "submit_download",
+)
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(bind=True)
+def extract_info(self, url: str) -> Dict[str, Any]:
+    return self.injector.get(InfoExtractor).extract(url)
+
+
+@celery.task(bind=True)
+def store_video_info(self, video_id: str) -> Dict[str, Any]:
+    session = self.injector.get(Session)
+    info = self.injector.get(InfoExtractor).extract(video_url(video_id))
+    video = store_video(info)
+    session.add(video)
+    session.commit()
+    return VideoSchema().dump(video).data
+
+
+@celery.task(bind=True)
+def store_playlist_info(self, playlist_id: str) -> Dict[str, Any]:
+    session = self.injector.get(Session)
+    info = self.injector.get(InfoExtractor).extract(playlist_url(playlist_id))
+    playlist = store_playlist(info)
+    session.add(playlist)
+    store_videos(session, info["entries"], playlist)
+    session.commit()
+    return PlaylistSchema().dump(playlist).data
+
+
+@celery.task(bind=True)
+def submit_download(
+    self, video_id: str, options: Dict[str, Any], priority: str = NORMAL
+) -> Dict[str, Any]:
+    submitter = self.injector.get(DownloadSubmitter)
+    dl = submitter.submit(video_id, options, priority=priority)
+    return DownloadSchema().dump(dl).data
@@ -0,0 +1,140 @@
+"""
+Queues that downloads and extraction are routed to, so a playlist backfill
+can't starve a download someone is waiting on. Downloads submitted one at a
+time and short videos take the fast lane, playlists and the rest of bulk
+submissions the bulk lane, and metadata extraction has its own lane.
+Anything else, e.g. cleanup, stays on celery's default queue.
+
+Lanes are off until DownloadTaskConfig.lanes is set, since workers only
+consume celery's default queue unless told otherwise. With lanes on,
+workers subscribe to them with ``fytdl celery worker --lanes fast,extract``.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from injector import inject
+from kombu import Exchange, Queue
+
+from ..config import DownloadTaskConfig
+from ..exceptions import FlaskYoutubeDLException
+from ..extensions import celery
+
+__all__ = (
+    "BULK",
+    "DEFAULT",
+    "DownloadLanes",
+    "EXTRACT",
+    "FAST",
+    "HIGH",
+    "LANES",
+    "LOW",
+    "NORMAL",
+    "PRIORITIES",
+    "UnknownLane",
+)
+
+FAST = "fast"
+BULK = "bulk"
+EXTRACT = "extract"
+DEFAULT = "default"
+LANES = (FAST, BULK, EXTRACT, DEFAULT)
+
+HIGH = "high"
+NORMAL = "normal"
+LOW = "low"
+# the way amqp orders them, higher goes first
+PRIORITIES = {HIGH: 9, NORMAL: 5, LOW: 0}
+
+_REDIS_SCHEMES = ("redis://", "rediss://", "redis+socket://", "sentinel://")
+
+
+class UnknownLane(FlaskYoutubeDLException):
+    pass
+
+
+class DownloadLanes:
+    @inject
+    def __init__(self, task_config: DownloadTaskConfig):
+        self._task_config = task_config
+
+    def queue(self, lane: str, default_queue: Optional[str] = None) -> str:
+        if lane not in LANES:
+            raise UnknownLane(lane)
+
+        if lane == DEFAULT or not self._task_config.lanes:
+            return default_queue or celery.conf.task_default_queue
+
+        return f"{self._task_config.lane_queue_prefix}{lane}"
+
+    def queues(
+        self, lanes: Iterable[str], default_queue: Optional[str] = None
+    ) -> List[str]:
+        return list(dict.fromkeys(self.queue(lane, default_queue) for lane in lanes))
+
+    def lane_for(self, duration: Optional[int], interactive: bool = False) -> str:
+        """
+        Videos that are submitted on their own or known to be short take
+        the fast lane
+        """
+        max_duration = self._task_config.fast_lane_max_duration
+
+        if interactive or (duration is not None and duration <= max_duration):
+            return FAST
+
+        return BULK
+
+    def options(self, lane: str, priority: str = NORMAL) -> Dict[str, Any]:
+        """
+        Publish options for a download in the lane
+        """
+        return {
+            "queue": self.queue(lane),
+            "priority": _broker_priority(priority, celery.conf.broker_url),
+        }
+
+    def task_routes(self) -> Dict[str, Dict[str, str]]:
+        """
+        Routes for tasks published without a queue, downloads default to
+        the bulk lane
+        """
+        if not self._task_config.lanes:
+            return {}
+
+        return {
+            "flask_youtubedl.worker.jobs.*": {"queue": self.queue(EXTRACT)},
+            "flask_youtubedl.worker.tasks.process_video_download": {
+                "queue": self.queue(BULK)
+            },
+        }
+
+    def task_queues(self, default_queue: str) -> Optional[List[Queue]]:
+        """
+        The lane queues, declared with a max priority so amqp brokers honor
+        priorities within them. The default queue is declared as it always
+        was, brokers refuse to redeclare a queue with other arguments.
+        """
+        if not self._task_config.lanes:
+            return None
+
+        max_priority = max(PRIORITIES.values())
+        default = Queue(
+            default_queue, Exchange(default_queue), routing_key=default_queue
+        )
+        return [default] + [
+            Queue(
+                self.queue(lane),
+                routing_key=self.queue(lane),
+                queue_arguments={"x-max-priority": max_priority},
+            )
+            for lane in LANES
+            if lane != DEFAULT
+        ]
+
+
+def _broker_priority(priority: str, broker_url: Optional[str]) -> int:
+    value = PRIORITIES[priority]
+
+    # the redis transport runs lower numbers first
+    if broker_url and broker_url.startswith(_REDIS_SCHEMES):
+        return max(PRIORITIES.values()) - value
+
+    return value
@@ -0,0 +1,110 @@
+"""
+Downloads of a submission that may only run so many at once are split into
+that many slots, each running one download at a time. A slot's downloads
+are queued in the database and only the first is published, each one
+publishes the next once it's done. Messages only ever carry their slot's
+key, whatever is left of it stays here.
+
+Slots whose download ended without publishing the next, e.g. because it
+was revoked or its worker went away, are moved along by
+worker.tasks.sweep_download_slots.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.utils import batched
+from ..models import Download, DownloadAttempt, QueuedDownload
+
+__all__ = ("advance_slot", "fill_slots", "stalled_slots")
+
+# a download's id and its publish options
+QUEUED_TYPE = Tuple[str, Dict[str, Any]]
+
+
+def fill_slots(
+    session: Session, downloads: List[QUEUED_TYPE], concurrency: int
+) -> List[Tuple[str, QUEUED_TYPE]]:
+    """
+    Splits the downloads into slots and queues them, committing the session.
+    Returns each slot's key along with the download to publish first.
+    """
+    prefix = uuid4()
+    slots = [
+        (f"{prefix}:{i}", downloads[i::concurrency])
+        for i in range(concurrency)
+        if downloads[i::concurrency]
+    ]
+    rows = [
+        {
+            "slot": slot,
+            "download_id": download_id,
+            "publish_options": json.dumps(options),
+        }
+        for (slot, queued) in slots
+        for (download_id, options) in queued
+    ]
+
+    for batch in batched(rows):
+        session.execute(QueuedDownload.__table__.insert(), batch)
+
+    session.commit()
+    return [(slot, queued[0]) for (slot, queued) in slots]
+
+
+def advance_slot(session: Session, slot: str, done: str) -> Optional[QUEUED_TYPE]:
+    """
+    Removes the download that's done from its slot and returns the next one
+    to publish, if there is one. Nothing is removed if the slot already moved
+    past it. The slot stays locked until the session commits, publish the
+    next download before committing so it's never dropped.
+    """
+    (head, *rest) = (
+        session.query(QueuedDownload)
+        .filter(QueuedDownload.slot == slot)
+        .order_by(QueuedDownload.id)
+        .limit(2)
+        .with_for_update()
+        .all()
+    ) or [None]
+
+    if head is None or head.download_id != done:
+        return None
+
+    session.delete(head)
+
+    if not rest:
+        return None
+
+    return rest[0].download_id, json.loads(rest[0].publish_options)
+
+
+def stalled_slots(
+    session: Session, stale_after: int
+) -> List[Tuple[QueuedDownload, Optional[DownloadAttempt]]]:
+    """
+    The slots whose download hasn't moved in stale_after seconds, along with
+    its latest attempt. Downloads that haven't started are left alone, they
+    may be waiting behind others in their queue.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    first = session.query(func.min(QueuedDownload.id)).group_by(QueuedDownload.slot)
+    heads = session.query(QueuedDownload).filter(QueuedDownload.id.in_(first))
+
+    stalled = []
+    for head in heads:
+        dl = Download.query.filter(Download.download_id == head.download_id).first()
+        attempt = dl.latest_attempt if dl else None
+
+        if attempt is not None and attempt.is_pending():
+            continue
+
+        changed = attempt.last_modified if attempt is not None else head.created
+        if changed is None or changed < cutoff:
+            stalled.append((head, attempt))
+
+    return stalled
@@ -0,0 +1,298 @@
+import json
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from celery import group
+from injector import inject
+from sqlalchemy.orm import Session, contains_eager, joinedload
+
+from ..core.extraction import InfoExtractor
+from ..core.utils import (
+    batched,
+    ensure_videos,
+    playlist_url,
+    store_playlist,
+    store_video,
+    store_videos,
+    video_url,
+)
+from ..exceptions import FlaskYoutubeDLException
+from ..models import (
+    Download,
+    DownloadAttempt,
+    DownloadSubmission,
+    Playlist,
+    PlaylistDownloadProgress,
+    Video,
+)
+from ..models.video import video_to_playlist
+from .lanes import BULK, FAST, NORMAL, DownloadLanes
+from .slots import fill_slots
+from .tasks import process_video_download
+
+__all__ = ("DownloadBlocked", "DownloadSubmitter")
+
+
+class DownloadBlocked(FlaskYoutubeDLException):
+    pass
+
+
+class DownloadSubmitter:
+    """
+    Creates downloads and queues new attempts for them, used both by the
+    download views and by jobs that run the same thing off the request path
+    """
+
+    @inject
+    def __init__(
+        self, extractor: InfoExtractor, session: Session, lanes: DownloadLanes
+    ):
+        self._extractor = extractor
+        self._session = session
+        self._lanes = lanes
+
+    def find(self, video_id: str) -> Optional[Download]:
+        return (
+            Download.query.join(Video, Download.video)
+            .options(joinedload(Download.latest_attempt))
+            .filter(Video.video_id == video_id)
+            .order_by(Download.id)
+            .first()
+        )
+
+    def find_many(self, video_ids: Iterable[str]) -> Dict[str, Download]:
+        downloads = {}
+        for batch in batched(set(video_ids)):
+            query = (
+                Download.query.join(Video, Download.video)
+                .options(
+                    contains_eager(Download.video), joinedload(Download.latest_attempt)
+                )
+                .filter(Video.video_id.in_(batch))
+                .add_columns(Video.video_id)
+                .order_by(Download.id)
+            )
+            for (dl, video_id) in query:
+                # same as find, the oldest download for a video wins
+                downloads.setdefault(video_id, dl)
+        return downloads
+
+    def submit(
+        self,
+        video_id: str,
+        options: Dict[str, Any],
+        dl: Optional[Download] = None,
+        priority: str = NORMAL,
+    ) -> Download:
+        dl = dl if dl is not None else self.find(video_id)
+
+        if dl is None:
+            info = self._extractor.extract(video_url(video_id))
+            video = store_video(info)
+            self._session.add(video)
+            self._session.flush()
+            self._lock_videos([video])
+            # created by another submission while this one was extracting
+            dl = self.find(video_id)
+
+            if dl is None:
+                dl = Download()
+                dl.download_id = str(uuid4())
+                dl.video = video
+                self._session.add(dl)
+
+        if dl.block_further:
+            raise DownloadBlocked(f"{dl.download_id} is blocked from further downloads")
+
+        if _needs_new_attempt(dl):
+            attempt = dl.start_new_attempt()
+            attempt.set_options(options)
+            self._session.add(attempt)
+            self._session.commit()
+            # someone is waiting on this one
+            process_video_download.apply_async(
+                (str(dl.download_id),), **self._lanes.options(FAST, priority)
+            )
+
+        return dl
+
+    def submit_many(
+        self,
+        video_ids: Iterable[str],
+        options: Dict[str, Any],
+        concurrency: Optional[int] = None,
+        lane: Optional[str] = None,
+        priority: str = NORMAL,
+    ) -> List[DownloadSubmission]:
+        """
+        Submits many videos in a constant number of queries, one commit and
+        one publish. Videos that aren't stored yet are not extracted here,
+        bare rows are created and the worker fills in their metadata.
+
+        With a concurrency, at most that many of these downloads run at once.
+        Without a lane, videos known to be short take the fast lane and the
+        rest the bulk lane.
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        videos = ensure_videos(self._session, video_ids)
+        self._lock_videos(videos.values())
+        downloads = self.find_many(video_ids)
+
+        blocked = {id for (id, dl) in downloads.items() if dl.block_further}
+        queued = [
+            id
+            for id in video_ids
+            if id not in blocked
+            and (id not in downloads or _needs_new_attempt(downloads[id]))
+        ]
+
+        if queued:
+            self._create_downloads([videos[id] for id in queued if id not in downloads])
+            downloads = self.find_many(video_ids)
+            self._create_attempts([downloads[id] for id in queued], options)
+            self._session.commit()
+            # reload with the new attempts in one query rather than one each
+            downloads = self.find_many(video_ids)
+
+            self._publish([downloads[id] for id in queued], concurrency, lane, priority)
+
+        statuses = dict.fromkeys(blocked, DownloadSubmission.BLOCKED)
+        statuses.update(dict.fromkeys(queued, DownloadSubmission.QUEUED))
+
+        return [
+            DownloadSubmission(
+                id, statuses.get(id, DownloadSubmission.EXISTING), downloads.get(id)
+            )
+            for id in video_ids
+        ]
+
+    def submit_playlist(
+        self,
+        playlist_id: str,
+        options: Dict[str, Any],
+        concurrency: int,
+        priority: str = NORMAL,
+    ) -> PlaylistDownloadProgress:
+        # only the entry ids are needed, the worker extracts each video anyway
+        info = self._extractor.extract(
+            playlist_url(playlist_id), extract_flat="in_playlist"
+        )
+        playlist = store_playlist(info)
+        self._session.add(playlist)
+
+        videos = store_videos(self._session, info["entries"], playlist)
+        self._session.flush()
+        # a backfill, however short its videos
+        self.submit_many(
+            list(videos), options, concurrency=concurrency, lane=BULK, priority=priority
+        )
+        return self.playlist_progress(playlist_id)
+
+    def playlist_progress(self, playlist_id: str) -> Optional[PlaylistDownloadProgress]:
+        playlist = Playlist.query.filter(Playlist.playlist_id == playlist_id).first()
+        if playlist is None:
+            return None
+
+        video_ids = [
+            video_id
+            for (video_id,) in self._session.query(Video.video_id)
+            .join(video_to_playlist)
+            .filter(video_to_playlist.c.playlist_id == playlist.id)
+        ]
+        downloads = self.find_many(video_ids)
+
+        statuses = Counter(
+            dl.latest_attempt.status if dl.latest_attempt else "Pending"
+            for dl in downloads.values()
+        )
+        blocked = sum(1 for dl in downloads.values() if dl.block_further)
+
+        return PlaylistDownloadProgress(
+            playlist_id=playlist_id,
+            total=len(video_ids),
+            submitted=len(downloads),
+            blocked=blocked,
+            statuses=dict(statuses),
+        )
+
+    def _publish(
+        self,
+        downloads: List[Download],
+        concurrency: Optional[int],
+        lane: Optional[str],
+        priority: str,
+    ) -> None:
+        def options(dl: Download) -> Dict[str, Any]:
+            dl_lane = lane or self._lanes.lane_for(dl.video.duration)
+            return self._lanes.options(dl_lane, priority)
+
+        if not concurrency:
+            group(
+                process_video_download.si(str(dl.download_id)).set(**options(dl))
+                for dl in downloads
+            ).apply_async()
+            return
+
+        # only the first download of each slot is published, each publishes
+        # the next one in its slot once it's done, see worker.slots
+        slots = fill_slots(
+            self._session,
+            [(str(dl.download_id), options(dl)) for dl in downloads],
+            concurrency,
+        )
+        group(
+            process_video_download.si(download_id, slot=slot).set(**slot_options)
+            for (slot, (download_id, slot_options)) in slots
+        ).apply_async()
+
+    def _create_downloads(self, videos: List[Video]) -> None:
+        for batch in batched(videos):
+            self._session.execute(
+                Download.__table__.insert(),
+                [
+                    {
+                        "download_id": str(uuid4()),
+                        "video_id": video.id,
+                        "block_further": False,
+                    }
+                    for video in batch
+                ],
+            )
+
+    def _lock_videos(self, videos: Iterable[Video]) -> None:
+        """
+        Locks the videos' rows until the submission commits. Submissions of
+        the same video wait on each other here, so only the first creates a
+        download for it and the others find that one. Rows are always locked
+        in the same order so submissions of overlapping videos can't
+        deadlock.
+        """
+        for batch in batched(sorted(video.id for video in videos)):
+            self._session.query(Video.id).filter(Video.id.in_(batch)).order_by(
+                Video.id
+            ).with_for_update().all()
+
+    def _create_attempts(
+        self, downloads: List[Download], options: Dict[str, Any]
+    ) -> None:
+        serialized_options = json.dumps(options if options is not None else {})
+
+        for batch in batched(downloads):
+            self._session.execute(
+                DownloadAttempt.__table__.insert(),
+                [
+                    {
+                        "download_id": dl.id,
+                        "video_id": dl.video_id,
+                        "options": serialized_options,
+                        "status": "Pending",
+                    }
+                    for dl in batch
+                ],
+            )
+
+
+def _needs_new_attempt(dl: Download) -> bool:
+    attempt = dl.latest_attempt
+    return not attempt or attempt.is_failed() or attempt.is_canceled()
@@ -1,29 +1,101 @@
+import glob
 import json
 import logging
-from typing import Dict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from pathlib import Path
 from celery import group
-from celery.exceptions import Reject
+from celery.exceptions import Reject, Retry
 from injector import ClassAssistedBuilder
 from sqlalchemy.orm import Session
 
+from ..core.artifacts import ArtifactStore, NullArtifactStore
+from ..core.extraction import InfoExtractor
+from ..core.progress import ProgressSink
+from ..config import DownloadTaskConfig
+from ..core.rate_limit import DownloadLimiter
+from ..core.retry import backoff
 from ..core.task import DownloadTask
+from ..core.utils import update_video
 from ..extensions import celery
-from ..models import Download, DownloadAttempt
+from ..models import Download, DownloadAttempt, Video
 from .hook import (
     DownloadAttemptHandleOnError,
     DownloadAttemptHook,
+    RetryTransientFailures,
     TooManyFailedAttempts,
 )
+from .slots import advance_slot, stalled_slots
 
-__all__ = ("process_video_download",)
+__all__ = ("process_video_download", "sweep_download_slots")
 
 logger = logging.getLogger(__name__)
 
 
 @celery.task(bind=True)
-def process_video_download(self, download_id: str) -> None:
+def process_video_download(self, download_id: str, slot: Optional[str] = None) -> None:
+    """
+    Downloads the video. Downloads in a slot, see worker.slots, publish the
+    next download of their slot once they're done, however it went. Retries
+    hold on to the slot, so the next one waits for the retry.
+    """
+    retrying = False
+
+    try:
+        _process_video_download(self, download_id)
+    except Retry:
+        retrying = True
+        raise
+    finally:
+        if slot and not retrying:
+            _advance_slot(self.injector.get(Session), slot, download_id)
+
+
+def _advance_slot(session: Session, slot: str, done: str) -> None:
+    try:
+        queued = advance_slot(session, slot, done)
+        if queued is not None:
+            _publish_queued(slot, queued)
+        session.commit()
+    except Exception:
+        session.rollback()
+        # don't mask whatever happened to this download
+        logger.exception(f"Could not move {slot} past {done}, left to the sweep")
+
+
+def _publish_queued(slot: str, queued: Tuple[str, Dict[str, Any]]) -> None:
+    (download_id, options) = queued
+    process_video_download.apply_async((download_id,), {"slot": slot}, **options)
+
+
+@celery.task(bind=True)
+def sweep_download_slots(self) -> None:
+    """
+    Moves along slots stuck on a download that ended without publishing the
+    next one, e.g. because it was revoked, and republishes downloads whose
+    worker went away while downloading. Meant to be run periodically, e.g.
+    by celery beat or with fytdl sweep-slots.
+    """
+    session = self.injector.get(Session)
+    stale_after = self.injector.get(DownloadTaskConfig).slot_stale_after
+
+    for (head, attempt) in stalled_slots(session, stale_after):
+        if attempt is not None and attempt.is_downloading():
+            # the next attempt resumes whatever it left behind
+            attempt.set_error("Abandoned while downloading", when=datetime.utcnow())
+            queued = (head.download_id, json.loads(head.publish_options))
+            logger.warning(f"Republishing {head.download_id}, it stopped downloading")
+            _publish_queued(head.slot, queued)
+            session.commit()
+        else:
+            logger.warning(f"Moving {head.slot} past {head.download_id}")
+            _advance_slot(session, head.slot, head.download_id)
+
+    session.close()
+
+
+def _process_video_download(self, download_id: str) -> None:
     session = self.injector.get(Session)
 
     try:
@@ -46,42 +118,183 @@ def process_video_download(self, download_id: str) -> None:
         logger.error(msg)
         return
 
-    attempt = dl.latest_attempt
+    extractor = dl.video.extractor
+    limiter = self.injector.get(DownloadLimiter)
+
+    if (wait := limiter.acquire(extractor, self.request.id)) > 0:
+        logger.info(f"Deferring {download_id} by {wait:.1f}s, {extractor} is limited")
+        session.close()
+        raise self.retry(countdown=wait, max_retries=None)
+
+    try:
+        _run_download(self, session, dl)
+    finally:
+        limiter.release(extractor, self.request.id)
+
+
+def _run_download(celery_task, session: Session, dl: Download) -> None:
+    task_config = celery_task.injector.get(DownloadTaskConfig)
+    attempt = previous = dl.latest_attempt
 
     if not attempt or attempt.is_failed() or attempt.is_canceled():
         attempt = dl.start_new_attempt()
+        # retries run with the options the download was submitted with
+        if previous is not None:
+            attempt.options = previous.options
         session.add(attempt)
 
-    attempt.task_id = self.request.id
+    _resume_partial(dl, attempt)
+    attempt.task_id = celery_task.request.id
     session.commit()
 
+    options = {}
+
     if attempt.options:
         try:
             options = json.loads(attempt.options)
         except Exception as e:
             attempt.set_error(
-                "Could not decode provided options: {dl.options}",
+                f"Could not decode provided options: {attempt.options}",
                 when=datetime.utcnow(),
             )
             session.commit()
             return
 
     progress_hooks = options.setdefault("progress_hooks", [])
-    progress_hooks.append(DownloadAttemptHook(attempt, session))
-    task_factory = self.injector.get(ClassAssistedBuilder[DownloadTask])
+    sink_builder = celery_task.injector.get(ClassAssistedBuilder[ProgressSink])
+    sink = sink_builder.build(attempt=attempt)
+    progress_hooks.append(DownloadAttemptHook(attempt, sink))
+    # stored artifacts are only looked up from extracted info
+    artifacts = celery_task.injector.get(ArtifactStore)
+    info = _get_video_info(
+        celery_task.injector.get(InfoExtractor),
+        dl.video,
+        need_info=not isinstance(artifacts, NullArtifactStore),
+    )
+    session.commit()
+
+    retry = RetryTransientFailures(attempt, dl, task_config.max_attempts)
+    task_factory = celery_task.injector.get(ClassAssistedBuilder[DownloadTask])
     task = task_factory.build(
         url=dl.video.webpage_url,
         run_options=options,
-        on_error=[DownloadAttemptHandleOnError(attempt), TooManyFailedAttempts(dl, 3)],
+        on_error=[
+            DownloadAttemptHandleOnError(attempt),
+            retry,
+            TooManyFailedAttempts(dl, task_config.max_attempts),
+        ],
+        info=info,
     )
 
     task.run()
 
-    session.commit()
+    # writes whatever progress was buffered since the last checkpoint
+    sink.close()
+
+    if dl.block_further:
+        # nothing will resume it anymore
+        _remove_partials(attempt)
+
+    if task_config.retry_transient and retry.should_retry():
+        countdown = backoff(
+            retry.failed_attempts() - 1,
+            base=task_config.retry_backoff_base,
+            cap=task_config.retry_backoff_max,
+        )
+        attempt.message = f"{attempt.message}, retrying in {countdown:.0f}s"
+        session.commit()
+        session.close()
+        # picks up the failed attempt and starts the next one
+        raise celery_task.retry(countdown=countdown, max_retries=None)
+
     session.close()
 
+
+def _resume_partial(dl: Download, attempt: DownloadAttempt) -> None:
+    """
+    Points an attempt that hasn't started at the partial file the most
+    recent earlier attempt left behind, if both were submitted with the
+    same options. youtube-dl continues it with a ranged request as long as
+    the attempt's output template resolves to the same file. A partial left
+    by other options is removed instead, youtube-dl would otherwise continue
+    it with whatever the new options select if the filename matches.
+    """
+    if attempt.downloaded_bytes or attempt.tmpfilename:
+        return
+
+    for previous in reversed(dl.attempts):
+        if previous is attempt or not previous.tmpfilename:
+            continue
+
+        partial = Path(previous.tmpfilename)
+        if not partial.is_file():
+            return
+
+        if attempt.has_options_of(previous):
+            attempt.resume_from(previous, partial.stat().st_size)
+            logger.info(f"Resuming {partial} from {attempt.downloaded_bytes} bytes")
+        else:
+            logger.info(f"Options changed since {partial}, not resuming it")
+            _remove_partials(previous)
+
+        return
+
+
+def _remove_partials(attempt: DownloadAttempt) -> None:
+    """
+    Removes the partial file and whatever youtube-dl keeps next to it to
+    resume fragmented downloads
+    """
+    if not attempt.tmpfilename:
+        return
+
+    partial = Path(attempt.tmpfilename)
+    leftovers = [partial]
+
+    if attempt.filename:
+        leftovers.append(Path(f"{attempt.filename}.ytdl"))
+
+    for suffix in ("-Frag*", "-Prefetch*"):
+        leftovers.extend(partial.parent.glob(f"{glob.escape(partial.name)}{suffix}"))
+
+    for leftover in leftovers:
+        leftover.unlink(missing_ok=True)
+
+
+def _get_video_info(
+    extractor: InfoExtractor, video: Video, need_info: bool = False
+) -> Optional[Dict]:
+    """
+    Reuses whatever the submitting request already extracted. Videos stored
+    without extracting them, e.g. by a bulk submission or from unresolved
+    playlist entries, are extracted here so their metadata can be filled in,
+    and that extraction is then reused for the download itself. So are
+    videos whose extraction isn't cached anymore when need_info is set,
+    otherwise youtube-dl extracts them as it downloads.
+    """
+    if video.name is not None and video.duration is not None:
+        info = extractor.cached(video.webpage_url)
+        if info is not None or not need_info:
+            return info
+
+    try:
+        info = extractor.extract(video.webpage_url)
+    except Exception:
+        # leave it to the download to fail and record why
+        logger.exception(f"Could not extract info for {video.webpage_url}")
+        return None
+
+    if info is not None:
+        update_video(video, info)
+
+    return info
+
+
 @celery.task(bind=True)
 def cleanup_attempt(self, download_attempt_id: int):
+    """
+    Removes what an abandoned attempt downloaded, partial or not
+    """
     session = self.injector.get(Session)
     attempt = DownloadAttempt.query.get(download_attempt_id)
 
@@ -91,5 +304,4 @@ def cleanup_attempt(self, download_attempt_id: int):
     if attempt.filename:
         Path(attempt.filename).unlink(missing_ok=True)
 
-    if attempt.tmpfilename:
-        Path(attempt.tmpfilename).unlink(missing_ok=True)
+    _remove_partials(attempt)
@@ -0,0 +1,25 @@
+import pytest
+
+from flask_youtubedl.app import make_app
+from flask_youtubedl.extensions import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    cfg = tmp_path / "fytdl.cfg"
+    cfg.write_text(
+        f'SQLALCHEMY_DATABASE_URI = "sqlite:///{tmp_path / "fytdl.db"}"\n'
+        'CELERY_BROKER_URL = "memory://"\n'
+        "TESTING = True\n"
+    )
+    app = make_app(cfg, tmp_path / "instance")
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,84 @@
+from typing import Any, Dict, Optional
+
+import pytest
+
+from flask_youtubedl.core.progress import LiveProgress
+from flask_youtubedl.extensions import db
+from flask_youtubedl.models import Download, DownloadAttempt, Video
+
+
+class DictLiveProgress(LiveProgress):
+    def __init__(self):
+        self.progress = {}
+
+    def publish(self, attempt_id: int, progress: Dict[str, Any]) -> None:
+        self.progress[attempt_id] = progress
+
+    def get(self, attempt_id: int) -> Optional[Dict[str, Any]]:
+        return self.progress.get(attempt_id)
+
+    def clear(self, attempt_id: int) -> None:
+        self.progress.pop(attempt_id, None)
+
+
+@pytest.fixture
+def live_progress(app):
+    live_progress = DictLiveProgress()
+    app.injector.binder.bind(LiveProgress, to=live_progress)
+    return live_progress
+
+
+@pytest.fixture
+def downloading(app) -> DownloadAttempt:
+    video = Video(
+        video_id="abc",
+        name="abc",
+        extractor="youtube",
+        webpage_url="https://www.youtube.com/watch?v=abc",
+    )
+    attempt = Download(download_id="dl-abc", video=video).start_new_attempt()
+    attempt.set_downloading({"downloaded_bytes": 10, "total_bytes": 1000})
+    db.session.add(attempt)
+    db.session.commit()
+    return attempt
+
+
+def test_unchanged_live_progress_is_not_modified(
+    client, live_progress, downloading
+):
+    live_progress.publish(
+        downloading.id,
+        {"status": "Downloading", "downloaded_bytes": 500, "total_bytes": 1000},
+    )
+    last_modified = downloading.last_modified
+
+    first = client.get("/download/video/abc/latest")
+    second = client.get("/download/video/abc/latest")
+
+    assert first.status_code == 200
+    assert first.get_json()["downloaded_bytes"] == 500
+    assert first.headers["ETag"] == second.headers["ETag"]
+
+    again = client.get(
+        "/download/video/abc/latest", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert again.status_code == 304
+
+    # polling never writes the live progress to the attempt
+    db.session.expire_all()
+    attempt = DownloadAttempt.query.get(downloading.id)
+    assert attempt.downloaded_bytes == 10
+    assert attempt.last_modified == last_modified
+
+
+def test_new_live_progress_is_modified(client, live_progress, downloading):
+    live_progress.publish(downloading.id, {"downloaded_bytes": 500})
+    first = client.get("/download/video/abc/latest")
+
+    live_progress.publish(downloading.id, {"downloaded_bytes": 600})
+    second = client.get(
+        "/download/video/abc/latest", headers={"If-None-Match": first.headers["ETag"]}
+    )
+
+    assert second.status_code == 200
+    assert second.get_json()["downloaded_bytes"] == 600